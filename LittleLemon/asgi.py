@@ -12,5 +12,10 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "LittleLemon.settings")
+os.environ.setdefault("LITTLELEMON_ASYNC_VIEWS", "1")
+# Async views run their queries on whichever thread sync_to_async picks, so
+# persistent connections are never reused and Django advises against them
+# under ASGI; each request opens its own.
+os.environ.setdefault("LITTLELEMON_CONN_MAX_AGE", "0")
 
 application = get_asgi_application()
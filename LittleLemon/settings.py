@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,7 +45,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "LittleLemonAPI.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "LittleLemonAPI.compression.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -81,6 +84,64 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {
+            # Take the write lock when a transaction starts, so concurrent
+            # checkouts queue behind each other instead of failing to upgrade
+            # a read lock halfway through. This applies to every atomic()
+            # block, read-only ones included, so keep them short.
+            "transaction_mode": "IMMEDIATE",
+        },
+        # Keep connections open across requests under WSGI; the pragmas
+        # below then run once per connection instead of once per request.
+        # asgi.py defaults this to 0, as connections are not reused there,
+        # so every ASGI request pays for opening one and its pragmas.
+        "CONN_MAX_AGE": int(os.environ.get("LITTLELEMON_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": True,
+        # A file rather than the in-memory default, so tests can exercise
+        # concurrent connections from several threads.
+        "TEST": {"NAME": BASE_DIR / "test-db.sqlite3"},
+    }
+}
+
+# Optionally serve reads from a second, read-only connection to the same
+# file. In WAL mode readers never block the writer, and a read-only
+# connection can never take a write lock. See LittleLemonAPI.routers.
+if os.environ.get("LITTLELEMON_READ_REPLICA") == "1":
+    DATABASES["replica"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": f"file:{BASE_DIR / 'db.sqlite3'}?mode=ro",
+        "OPTIONS": {"uri": True},
+        "CONN_MAX_AGE": DATABASES["default"]["CONN_MAX_AGE"],
+        "CONN_HEALTH_CHECKS": True,
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["LittleLemonAPI.routers.ReadReplicaRouter"]
+
+# Applied to every new SQLite connection (LittleLemonAPI.signals).
+# synchronous=NORMAL is durable in WAL mode except for the last commits before
+# a power loss, and busy_timeout (ms) makes a blocked writer wait its turn
+# instead of failing. WAL itself, which lets reads run alongside the single
+# writer, is persistent and is switched on once by migration 0010, so merely
+# connecting never rewrites the database file.
+SQLITE_PRAGMAS = {
+    "synchronous": "normal",
+    "busy_timeout": 20000,
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,
+    "temp_store": "memory",
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Role lookups and the menu catalog are invalidated through version keys in
+# this cache, so it must be shared by every worker process.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "cache",
     }
 }
 
@@ -127,21 +188,27 @@ STATIC_URL = "static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
+    # The browsable API is a development tool; in production every response
+    # is compact JSON.
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
-        "rest_framework.renderers.BrowsableAPIRenderer",
+        "LittleLemonAPI.renderers.FastJSONRenderer",
+        *(["rest_framework.renderers.BrowsableAPIRenderer"] if DEBUG else []),
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "LittleLemonAPI.authentication.CachedTokenAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "LittleLemonAPI.throttling.AnonTokenBucketThrottle",
+        "LittleLemonAPI.throttling.UserTokenBucketThrottle",
+        "LittleLemonAPI.throttling.ScopedTokenBucketThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
         "anon": "20/day",
         "user": "100/day",
+        "menu": "120/minute",
+        "checkout": "10/minute",
+        "order-events": "720/hour",
     },
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
@@ -152,6 +219,29 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Delivered orders older than this are moved to the archive tables by
+# `manage.py archive_orders`; /api/orders/{orderId} still finds them.
+ORDER_ARCHIVE_AFTER_DAYS = int(os.environ.get("LITTLELEMON_ARCHIVE_AFTER_DAYS", "365"))
+
+# Idempotency keys older than this are deleted by
+# `manage.py purge_idempotency_keys`; a retry after that creates a new order.
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.environ.get("LITTLELEMON_IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+
+# Responses at least this long are gzipped for clients that accept it.
+COMPRESS_MIN_LENGTH = int(os.environ.get("LITTLELEMON_COMPRESS_MIN_LENGTH", "1024"))
+
+# Token buckets for the throttle classes, shared by every worker on the host.
+THROTTLE_DATABASE = BASE_DIR / "throttle.sqlite3"
+
+# Serve the hot read endpoints from async views. asgi.py turns this on; under
+# WSGI every async view would cost an event loop per request instead.
+ASYNC_READ_VIEWS = os.environ.get("LITTLELEMON_ASYNC_VIEWS") == "1"
+
+# Per-endpoint query/latency histograms, served to managers at /api/_metrics.
+# Slower requests are logged with their SQL.
+METRICS_ENABLED = os.environ.get("LITTLELEMON_METRICS") == "1"
+METRICS_SLOW_REQUEST_SECONDS = float(os.environ.get("LITTLELEMON_SLOW_REQUEST_SECONDS", "0.5"))
+
 DJOSER = {
     "USER_ID_FIELD": "username",
 }
@@ -0,0 +1,58 @@
+import time
+from django.db import transaction
+from .models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+
+# Delivered orders past ORDER_ARCHIVE_AFTER_DAYS are moved to ArchivedOrder and
+# ArchivedOrderItem, so listings, role lookups and the indexes every checkout
+# updates only cover recent and open orders. The report aggregates already
+# count archived orders and are left alone.
+
+ARCHIVE_BATCH_SIZE = 500
+
+
+def archive_batch(before, batch_size=ARCHIVE_BATCH_SIZE):
+    """Move up to `batch_size` of the oldest delivered orders dated before `before`; return how many moved.
+
+    The copy and the delete share one transaction, so an order is either
+    live or archived, never both or neither.
+    """
+    with transaction.atomic():
+        # `status IN (1)` with the date range is a seek on the (status, date)
+        # index that already returns the rows in date order.
+        orders = list(Order.objects.filter(status__in=[True], date__lt=before).order_by('date', 'id')[:batch_size])
+        if not orders:
+            return 0
+        ArchivedOrder.objects.bulk_create([
+            ArchivedOrder(
+                id=order.pk, user_id=order.user_id, delivery_crew_id=order.delivery_crew_id,
+                status=order.status, total=order.total, date=order.date,
+            )
+            for order in orders
+        ])
+        ArchivedOrderItem.objects.bulk_create([
+            ArchivedOrderItem(
+                id=item.pk, order_id=item.order_id, menuitem_id=item.menuitem_id,
+                quantity=item.quantity, unit_price=item.unit_price, price=item.price,
+            )
+            for item in OrderItem.objects.filter(order__in=orders)
+        ])
+        # Deleting the orders cascades to their items in one statement.
+        Order.objects.filter(pk__in=[order.pk for order in orders]).delete()
+    return len(orders)
+
+
+def archive_orders(before, batch_size=ARCHIVE_BATCH_SIZE, pause=0):
+    """Archive every delivered order dated before `before`, one batch per transaction; return how many moved.
+
+    Writers wait for at most one batch, and a run that is interrupted loses
+    nothing: the next one carries on with the orders that are still live.
+    `pause` seconds between batches leave room for other writers.
+    """
+    moved = 0
+    while True:
+        count = archive_batch(before, batch_size)
+        moved += count
+        if count < batch_size:
+            return moved
+        if pause:
+            time.sleep(pause)
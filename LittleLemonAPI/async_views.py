@@ -0,0 +1,156 @@
+import asyncio
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+from django.shortcuts import aget_object_or_404
+from django.urls import path
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .catalog import acatalog_response
+from .events import MAX_WAIT, apoll_events, event_stream, visible_events
+from .fastserializers import fast_data
+from .fieldsets import sparse_serializer
+from .models import Category, MenuItem
+from .pagination import AsyncPageNumberPagination
+from .renderers import EventStreamRenderer
+from .permissions import get_roles
+from .queries import optimize_queryset
+from .serializers import CategorySerializer, MenuItemSerializer, OrderSerializer
+from .views import CategoryView, MenuBootstrapView, MenuItemsView, MenuItemView, OrderEventsView, OrdersView
+
+# Under ASGI these views serve GET/HEAD on the event loop: the ORM is awaited
+# instead of holding a worker thread for the whole request. Authentication,
+# permissions and throttling touch the database and the throttle store
+# synchronously, so `initial` runs in one thread hop before the handler.
+
+
+class AsyncAPIView(APIView):
+    """`APIView` with an async `dispatch`, for views whose handlers are coroutines."""
+    http_method_names = ['get', 'head', 'options']
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncMenuItemsView(AsyncAPIView, MenuItemsView):
+    pagination_class = AsyncPageNumberPagination
+
+    async def get(self, request):
+        return await acatalog_response(request, self.alist)
+
+    async def alist(self):
+        # Filter validation may look up categories, so the queryset is built
+        # in a thread; only its evaluation is awaited.
+        queryset = await sync_to_async(self.filter_queryset)(self.get_queryset())
+        page = await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+        return self.get_paginated_response(fast_data(sparse_serializer(MenuItemSerializer, self.request), page, many=True))
+
+
+class AsyncMenuItemView(AsyncAPIView, MenuItemView):
+    async def get(self, request, pk):
+        return await acatalog_response(request, lambda: self.aretrieve(request, pk))
+
+    async def aretrieve(self, request, pk):
+        serializer_class = sparse_serializer(MenuItemSerializer, request)
+        menu_item = await aget_object_or_404(optimize_queryset(MenuItem.objects.all(), serializer_class), pk=pk)
+        return Response(fast_data(serializer_class, menu_item))
+
+
+class AsyncCategoryView(AsyncAPIView, CategoryView):
+    async def get(self, request):
+        return await acatalog_response(request, self.alist)
+
+    async def alist(self):
+        categories = [category async for category in Category.objects.all()]
+        return Response(fast_data(CategorySerializer, categories, many=True))
+
+
+class AsyncMenuBootstrapView(AsyncAPIView, MenuBootstrapView):
+    async def get(self, request):
+        return await acatalog_response(request, self.asnapshot)
+
+    async def asnapshot(self):
+        categories = [category async for category in Category.objects.all()]
+        featured = [menu_item async for menu_item in self.featured_items()]
+        rows = [row async for row in self.menu_rows()]
+        return Response(self.snapshot_data(categories, featured, rows))
+
+
+class AsyncOrdersView(AsyncAPIView, OrdersView):
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        get_roles(request)
+
+    async def get(self, request):
+        paginator = self.pagination_class()
+        paginated_orders = await paginator.apaginate_queryset(self.get_queryset(request), request)
+        serializer_class = sparse_serializer(OrderSerializer, request)
+        return paginator.get_paginated_response(fast_data(serializer_class, paginated_orders, many=True))
+
+
+class AsyncOrderEventsView(AsyncAPIView, OrderEventsView):
+    max_wait = MAX_WAIT
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        get_roles(request)
+
+    async def get(self, request):
+        since, wait = self.cursor(request)
+        data, last_id = await apoll_events(visible_events(request), since, wait)
+        return Response({"events": data, "last_id": last_id})
+
+
+class OrderEventStreamView(AsyncOrderEventsView):
+    """The order event feed as Server-Sent Events; browsers resume with `Last-Event-ID`."""
+    renderer_classes = [EventStreamRenderer]
+
+    async def get(self, request):
+        since, _ = self.cursor(request)
+        response = StreamingHttpResponse(event_stream(visible_events(request), since), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+def read_split(async_view, sync_view):
+    """Route GET/HEAD to `async_view` and every other method to `sync_view`."""
+    sync_view = sync_to_async(sync_view)
+
+    async def view(request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            return await async_view(request, *args, **kwargs)
+        return await sync_view(request, *args, **kwargs)
+
+    return csrf_exempt(view)
+
+
+urlpatterns = [
+    path('api/menu-items', read_split(AsyncMenuItemsView.as_view(), MenuItemsView.as_view())),
+    path('api/menu-items/<int:pk>', read_split(AsyncMenuItemView.as_view(), MenuItemView.as_view())),
+    path('api/categories', read_split(AsyncCategoryView.as_view(), CategoryView.as_view())),
+    path('api/menu/bootstrap', AsyncMenuBootstrapView.as_view()),
+    path('api/orders', read_split(AsyncOrdersView.as_view(), OrdersView.as_view())),
+    path('api/orders/events', AsyncOrderEventsView.as_view()),
+    # Only served under ASGI: each open stream would hold a WSGI worker.
+    path('api/orders/events/stream', OrderEventStreamView.as_view()),
+]
@@ -0,0 +1,107 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+from .permissions import load_roles, user_version, user_version_key
+
+TOKEN_CACHE_SIZE = 1024
+TOKEN_CACHE_TTL = 300
+
+
+def token_version_key(key):
+    return f'littlelemon:token-version:{key}'
+
+
+def token_version(key):
+    return cache.get_or_set(token_version_key(key), time.time_ns, None)
+
+
+def invalidate_token(key):
+    """Make every worker drop its cached authentication for token `key`."""
+    # A fresh value, not `incr`, for the reason given in catalog.bump_version.
+    cache.set(token_version_key(key), time.time_ns(), None)
+
+
+class TokenCache:
+    """Bounded, thread-safe LRU of token key -> cached authentication."""
+
+    def __init__(self, maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[-1] < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, token, roles, versions):
+        with self.lock:
+            self.entries[key] = (token, roles, versions, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def evict(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that skips the Token/User join for warm tokens.
+
+    A cached entry is only trusted while the token's and the user's shared
+    cache versions are the ones it was stored under. Logging out or
+    deactivating the user bumps the token version, saving the user or
+    changing their groups bumps the user version, so every worker process
+    drops the entry on its next lookup. Both versions are read before the database, so a concurrent
+    invalidation can never be cached over. The user's roles are cached
+    alongside and handed to the role resolver, so a warm request makes no
+    queries for either. Each request gets its own copy of the cached user
+    and token, so concurrent requests never share a mutable instance.
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None:
+            request._littlelemon_roles = self.roles
+        return result
+
+    def authenticate_credentials(self, key):
+        entry = token_cache.get(key)
+        if entry is not None:
+            token, roles, versions, _ = entry
+            keys = (token_version_key(key), user_version_key(token.user_id))
+            current = cache.get_many(keys)
+            if versions == tuple(current.get(version_key) for version_key in keys):
+                self.roles = roles
+                return self.detach(token)
+            token_cache.evict(key)
+
+        versions = (token_version(key),)
+        user, token = super().authenticate_credentials(key)
+        versions += (user_version(user.pk),)
+        self.roles = load_roles(user, versions[1])
+        token_cache.set(key, token, self.roles, versions)
+        return self.detach(token)
+
+    def detach(self, token):
+        token = copy.copy(token)
+        token.user = copy.copy(token.user)
+        return token.user, token
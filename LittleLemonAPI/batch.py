@@ -0,0 +1,75 @@
+import json
+from functools import lru_cache
+from io import BytesIO
+from django.core.handlers.wsgi import WSGIRequest
+from django.urls import Resolver404
+from django.urls.resolvers import RegexPattern, URLResolver
+from .permissions import get_roles
+
+# /api/batch runs several API calls in one round trip. Each sub-request is
+# dispatched in-process to the sync view its path resolves to, as the user
+# the batch request authenticated, so authentication and the role lookup
+# happen once. Views still apply their own permissions and throttles.
+
+BATCH_MAX_REQUESTS = 20
+BATCH_METHODS = ['GET', 'POST', 'PUT', 'PATCH', 'DELETE']
+# Request metadata the sub-requests inherit; everything else is their own.
+INHERITED_META = ('HTTP_HOST', 'HTTP_USER_AGENT', 'HTTP_X_FORWARDED_FOR', 'REMOTE_ADDR', 'SERVER_NAME', 'SERVER_PORT')
+
+
+@lru_cache(maxsize=None)
+def _resolver():
+    from .urls import sync_urlpatterns
+    return URLResolver(RegexPattern(r'^/'), sync_urlpatterns)
+
+
+def _sub_request(request, method, path, query, body):
+    content = b'' if body is None else json.dumps(body).encode()
+    environ = {key: value for key, value in request.META.items() if key in INHERITED_META}
+    environ.update({
+        'REQUEST_METHOD': method,
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(content)),
+        'wsgi.input': BytesIO(content),
+        'wsgi.url_scheme': request.scheme,
+    })
+    sub_request = WSGIRequest(environ)
+    sub_request.user = request.user
+    # DRF authenticates a request carrying these as the given user and token.
+    sub_request._force_auth_user = request.user
+    sub_request._force_auth_token = request.auth
+    sub_request._littlelemon_roles = get_roles(request)
+    return sub_request
+
+
+def _body(response):
+    # A DRF Response is not rendered yet, so its content can not be read;
+    # its data is the body, None for a 204.
+    if hasattr(response, 'data'):
+        return response.data
+    if not response.content:
+        return None
+    if response.get('Content-Type', '').startswith('application/json'):
+        return json.loads(response.content)
+    return response.content.decode()
+
+
+def dispatch(request, method, path, body=None):
+    """Run one sub-request of `request` and return `{'status': ..., 'body': ...}`."""
+    path, _, query = path.partition('?')
+    try:
+        match = _resolver().resolve(path)
+    except Resolver404:
+        return {'status': 404, 'body': {'detail': 'Not found.'}}
+    if match.route == 'api/batch':
+        return {'status': 400, 'body': {'detail': 'Batches can not be nested.'}}
+
+    response = match.func(_sub_request(request, method, path, query, body), *match.args, **match.kwargs)
+    if response.streaming:
+        # Not `response.close()`: that signals the end of the request, which
+        # closes the database connection under the rest of the batch.
+        return {'status': 400, 'body': {'detail': 'Streaming responses can not be batched.'}}
+    return {'status': response.status_code, 'body': _body(response)}
@@ -0,0 +1,349 @@
+import random
+import re
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import date, timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from .archive import archive_orders
+from .events import latest_event_id
+from .models import ArchivedOrder, Category, DailyRevenue, DeliveryCrewStats, MenuItem, Order, OrderEvent, OrderItem
+from .permissions import DELIVERY_CREW, MANAGER
+from .reports import rebuild_reports
+from .services import add_to_cart
+
+# Every route in urls.py is driven through the DRF test client against a
+# seeded database. Each case has a hard budget on the SQL statements one
+# request may run; latency and peak memory are recorded so a run can be
+# compared with a stored baseline.
+
+FULL_SCALE = {'menu_items': 10_000, 'orders': 100_000, 'users': 1_000}
+# Orders span a year; delivered ones older than this are archived.
+ARCHIVE_AFTER_DAYS = 300
+# Tables the API reads in full on purpose: one row per category, day or crew member.
+WHOLE_TABLE_READS = {model._meta.db_table for model in (Category, DailyRevenue, DeliveryCrewStats)}
+SCAN = re.compile(r'SCAN (\w+)(?: USING (?:COVERING )?INDEX \w+)?')
+# Latency and memory differences below these are noise, whatever the ratio.
+LATENCY_SLACK_MS = 1.0
+MEMORY_SLACK_KIB = 64
+
+
+@contextmanager
+def scratch_database():
+    """A migrated throwaway copy of the schema, with caches and throttle buckets kept in memory."""
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        with override_settings(
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+            THROTTLE_DATABASE=':memory:',
+        ):
+            yield
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+class Case:
+    """One request to benchmark: `path` and `data` are built per iteration from the seeded fixture."""
+
+    def __init__(self, method, route, role, path, budget, data=None, status=200, prepare=None, variant=None):
+        self.method = method
+        self.route = route
+        self.role = role
+        self.path = path
+        self.budget = budget
+        self.data = data
+        self.status = status
+        self.prepare = prepare
+        self.variant = variant
+
+    @property
+    def name(self):
+        variant = f' ({self.variant})' if self.variant else ''
+        return f'{self.method} {self.route}{variant} [{self.role}]'
+
+
+def seed(menu_items, orders, users, spares=1, seed=0):
+    """Fill the database with a synthetic catalog, users and order history.
+
+    Users are split 1% managers, 5% delivery crew and the rest customers;
+    every order has two items and an event in the order log, and delivered
+    orders from the oldest days are archived. `spares` extra menu items and
+    orders are left for the cases that delete one per iteration. Returns the fixture the
+    cases are built from.
+    """
+    rng = random.Random(seed)
+    managers_group, _ = Group.objects.get_or_create(name=MANAGER)
+    crew_group, _ = Group.objects.get_or_create(name=DELIVERY_CREW)
+
+    people = User.objects.bulk_create([User(username=f'bench-{n}', password='!') for n in range(max(users, 3))])
+    managers = people[:max(users // 100, 1)]
+    crew = people[len(managers):len(managers) + max(users // 20, 1)]
+    customers = people[len(managers) + len(crew):]
+    memberships = [User.groups.through(user_id=user.pk, group_id=managers_group.pk) for user in managers]
+    memberships += [User.groups.through(user_id=user.pk, group_id=crew_group.pk) for user in crew]
+    User.groups.through.objects.bulk_create(memberships)
+    admin = User.objects.create(username='bench-admin', password='!', is_staff=True, is_superuser=True)
+    promoted = User.objects.create(username='bench-promoted', password='!')
+
+    categories = Category.objects.bulk_create([Category(slug=f'category-{n}', title=f'Category {n}') for n in range(20)])
+    items = MenuItem.objects.bulk_create([
+        MenuItem(
+            title=f'Dish {n}', price=Decimal(rng.randrange(200, 3000)) / 100,
+            featured=rng.random() < 0.1, category=rng.choice(categories),
+        )
+        for n in range(max(menu_items, 2) + spares)
+    ], batch_size=2000)
+    items, spare_items = items[:-spares], items[-spares:]
+
+    today = date.today()
+    for start in range(0, orders + spares, 5000):
+        batch = []
+        for _ in range(start, min(start + 5000, orders + spares)):
+            batch.append((rng.sample(items, 2), rng.randrange(1, 4)))
+        created = Order.objects.bulk_create([
+            Order(
+                user=rng.choice(customers), delivery_crew=rng.choice(crew) if rng.random() < 0.7 else None,
+                status=rng.random() < 0.5, total=sum(item.price for item in pair) * quantity,
+                date=today - timedelta(days=rng.randrange(365)),
+            )
+            for pair, quantity in batch
+        ])
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, menuitem=item, quantity=quantity, unit_price=item.price, price=item.price * quantity)
+            for order, (pair, quantity) in zip(created, batch) for item in pair
+        ])
+        OrderEvent.objects.bulk_create([
+            OrderEvent(
+                order_id=order.pk, kind=OrderEvent.CREATED, user_id=order.user_id,
+                delivery_crew_id=order.delivery_crew_id, status=order.status,
+            )
+            for order in created
+        ])
+    archive_orders(today - timedelta(days=ARCHIVE_AFTER_DAYS))
+    rebuild_reports()
+
+    customer, crew_member = customers[0], crew[0]
+    return {
+        'users': {'manager': managers[0], 'crew': crew_member, 'customer': customer, 'admin': admin},
+        'promoted': promoted,
+        'category': categories[0],
+        'items': items[:50],
+        'spare_items': spare_items,
+        'customer_order': Order.objects.filter(user=customer).values_list('pk', flat=True).first(),
+        'crew_order': Order.objects.filter(delivery_crew=crew_member).values_list('pk', flat=True).first(),
+        'spare_orders': list(Order.objects.order_by('-pk').values_list('pk', flat=True)[:spares]),
+        'day': today - timedelta(days=1),
+        'last_event': latest_event_id(),
+        'archived_order': ArchivedOrder.objects.values_list('pk', flat=True).first(),
+    }
+
+
+def fill_cart(fixture, i):
+    add_to_cart(fixture['users']['customer'], [{'menuitem_id': item.pk, 'quantity': 2} for item in fixture['items'][:3]])
+
+
+def cases():
+    """The benchmark cases, reads before the writes that invalidate their caches."""
+    menu_item = lambda f, i: f"/api/menu-items/{f['items'][0].pk}"
+    return [
+        Case('GET', 'api/menu-items', 'customer', lambda f, i: '/api/menu-items?page=3', 3),
+        Case('GET', 'api/menu-items', 'customer', lambda f, i: f"/api/menu-items?category_id={f['category'].pk}&ordering=price", 3,
+             variant='filtered'),
+        Case('GET', 'api/menu-items/<int:pk>', 'customer', menu_item, 1),
+        Case('GET', 'api/categories', 'customer', lambda f, i: '/api/categories', 1),
+        Case('GET', 'api/menu/bootstrap', 'customer', lambda f, i: '/api/menu/bootstrap', 3),
+        Case('GET', 'api/groups/manager/users', 'manager', lambda f, i: '/api/groups/manager/users', 2),
+        Case('GET', 'api/groups/delivery-crew/users', 'manager', lambda f, i: '/api/groups/delivery-crew/users', 2),
+        Case('GET', 'api/orders', 'manager', lambda f, i: '/api/orders', 2),
+        Case('GET', 'api/orders', 'crew', lambda f, i: '/api/orders', 3),
+        Case('GET', 'api/orders', 'customer', lambda f, i: '/api/orders', 3),
+        Case('GET', 'api/orders', 'crew', lambda f, i: '/api/orders?status=0', 3, variant='undelivered'),
+        Case('GET', 'api/orders', 'manager', lambda f, i: '/api/orders?status=0', 2, variant='undelivered'),
+        Case('GET', 'api/orders', 'customer', lambda f, i: '/api/orders?fields=id,status,total,date,order_items.menuitem,order_items.quantity', 3,
+             variant='sparse'),
+        Case('GET', 'api/orders/<int:orderId>', 'customer', lambda f, i: f"/api/orders/{f['customer_order']}", 3),
+        Case('GET', 'api/orders/<int:orderId>', 'manager', lambda f, i: f"/api/orders/{f['archived_order']}", 4, variant='archived'),
+        Case('GET', 'api/orders/events', 'crew', lambda f, i: '/api/orders/events', 2),
+        Case('GET', 'api/orders/events', 'manager', lambda f, i: f"/api/orders/events?since={f['last_event']}", 1,
+             variant='caught up'),
+        # Live orders and their items, plus the archived orders of the range.
+        Case('GET', 'api/orders/export', 'manager', lambda f, i: f"/api/orders/export?start={f['day']}&end={f['day']}", 3),
+        Case('GET', 'api/reports/revenue', 'manager', lambda f, i: '/api/reports/revenue', 1),
+        Case('GET', 'api/reports/top-menu-items', 'manager', lambda f, i: '/api/reports/top-menu-items', 1),
+        Case('GET', 'api/reports/delivery-crew', 'manager', lambda f, i: '/api/reports/delivery-crew', 1),
+        Case('GET', 'api/_metrics', 'manager', lambda f, i: '/api/_metrics', 0),
+        Case('POST', 'api/cart/menu-items', 'customer', lambda f, i: '/api/cart/menu-items', 6,
+             data=lambda f, i: [{'menuitem_id': item.pk, 'quantity': 1} for item in f['items'][:5]], status=(200, 201)),
+        Case('GET', 'api/cart/menu-items', 'customer', lambda f, i: '/api/cart/menu-items', 1),
+        Case('GET', 'api/cart/summary', 'customer', lambda f, i: '/api/cart/summary', 1),
+        Case('POST', 'api/batch', 'customer', lambda f, i: '/api/batch', 3, data=lambda f, i: {'requests': [
+            {'method': 'GET', 'path': f"/api/menu-items/{f['items'][0].pk}"},
+            {'method': 'GET', 'path': '/api/cart/menu-items'},
+            {'method': 'GET', 'path': '/api/orders?fields=id,status,total'},
+        ]}),
+        Case('DELETE', 'api/cart/menu-items', 'customer', lambda f, i: '/api/cart/menu-items', 3, status=204),
+        Case('POST', 'api/orders', 'customer', lambda f, i: '/api/orders', 14, status=201, prepare=fill_cart),
+        Case('PUT', 'api/orders/<int:orderId>', 'manager', lambda f, i: f"/api/orders/{f['crew_order']}", 9,
+             data=lambda f, i: {'delivery_crew_id': f['users']['crew'].pk, 'status': bool(i % 2)}),
+        Case('PATCH', 'api/orders/<int:orderId>', 'crew', lambda f, i: f"/api/orders/{f['crew_order']}", 8,
+             data=lambda f, i: {'status': bool(i % 2)}),
+        Case('DELETE', 'api/orders/<int:orderId>', 'manager', lambda f, i: f"/api/orders/{f['spare_orders'][i]}", 13, status=204),
+        # With an m2m_changed receiver on User.groups, add() reads the existing
+        # rows before inserting instead of ignoring conflicts.
+        Case('POST', 'api/groups/manager/users', 'manager', lambda f, i: '/api/groups/manager/users', 6,
+             data=lambda f, i: {'username': f['promoted'].username}, status=201),
+        Case('DELETE', 'api/groups/manager/users/<int:userId>', 'manager', lambda f, i: f"/api/groups/manager/users/{f['promoted'].pk}", 5),
+        Case('POST', 'api/groups/delivery-crew/users', 'manager', lambda f, i: '/api/groups/delivery-crew/users', 6,
+             data=lambda f, i: {'username': f['promoted'].username}, status=201),
+        Case('DELETE', 'api/groups/delivery-crew/users/<int:userId>', 'manager', lambda f, i: f"/api/groups/delivery-crew/users/{f['promoted'].pk}", 5),
+        Case('POST', 'api/menu-items', 'manager', lambda f, i: '/api/menu-items', 2,
+             data=lambda f, i: {'title': f'Special {i}', 'price': '12.50', 'featured': False, 'category_id': f['category'].pk}, status=201),
+        Case('PUT', 'api/menu-items/<int:pk>', 'manager', menu_item, 3,
+             data=lambda f, i: {'title': 'Dish 0', 'price': f'{10 + i % 2}.00', 'featured': False, 'category_id': f['category'].pk}),
+        Case('PATCH', 'api/menu-items/<int:pk>', 'manager', menu_item, 3, data=lambda f, i: {'price': f'{11 + i % 2}.00'}),
+        # One DELETE per table that cascades from a menu item, archived order items included.
+        Case('DELETE', 'api/menu-items/<int:pk>', 'manager', lambda f, i: f"/api/menu-items/{f['spare_items'][i].pk}", 8, status=204),
+        Case('POST', 'api/menu-items/bulk', 'manager', lambda f, i: '/api/menu-items/bulk', 6, status=(200, 201),
+             data=lambda f, i: [{'id': item.pk, 'title': item.title, 'price': '9.00', 'category_id': item.category_id} for item in f['items'][:10]]
+             + [{'title': f'Bulk {i}-{n}', 'price': '7.00', 'category_id': f['category'].pk} for n in range(10)]),
+        Case('POST', 'api/categories', 'admin', lambda f, i: '/api/categories', 1,
+             data=lambda f, i: {'slug': f'bench-{i}', 'title': f'Bench {i}'}, status=201),
+    ]
+
+
+def percentile(values, percent):
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[percent - 1]
+
+
+def measure(case, client, fixture, i, trace=False):
+    if case.prepare is not None:
+        case.prepare(fixture, i)
+    path = case.path(fixture, i)
+    data = case.data(fixture, i) if case.data is not None else None
+    if trace:
+        tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(client, case.method.lower())(path, data, format='json')
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if trace else None
+    finally:
+        if trace:
+            tracemalloc.stop()
+    return response.status_code, queries.captured_queries, elapsed, peak
+
+
+@contextmanager
+def clients_for(fixture):
+    """A client authenticated as each role of `fixture`, with throttling out of the way."""
+    config = dict(settings.REST_FRAMEWORK)
+    config['DEFAULT_THROTTLE_RATES'] = {scope: '1000000/second' for scope in config['DEFAULT_THROTTLE_RATES']}
+    clients = {}
+    for role, user in fixture['users'].items():
+        clients[role] = APIClient()
+        clients[role].force_authenticate(user)
+    with override_settings(REST_FRAMEWORK=config, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+        cache.clear()
+        yield clients
+
+
+def run(fixture, iterations=20, selected=None):
+    """Run every case `iterations` times plus once under tracemalloc.
+
+    Returns `(results, failures)`: results by case name, and the requests
+    that exceeded their query budget or answered with an unexpected status.
+    The fixture needs `iterations + 1` spares.
+    """
+    results, failures = {}, []
+    with clients_for(fixture) as clients:
+        for case in cases():
+            if selected and case.name not in selected:
+                continue
+            expected = case.status if isinstance(case.status, tuple) else (case.status,)
+            latencies, counts, statuses, peak = [], [], set(), None
+            for i in range(iterations + 1):
+                status, queries, elapsed, traced = measure(case, clients[case.role], fixture, i, trace=i == iterations)
+                statuses.add(status)
+                counts.append(len(queries))
+                if traced is None:
+                    latencies.append(elapsed * 1000)
+                else:
+                    peak = traced / 1024
+            if not statuses <= set(expected):
+                failures.append(f'{case.name}: status {sorted(statuses)}, expected {case.status}')
+            if max(counts) > case.budget:
+                failures.append(f'{case.name}: {max(counts)} queries, budget {case.budget}')
+            results[case.name] = {
+                'queries': max(counts),
+                'budget': case.budget,
+                'p50_ms': round(percentile(latencies, 50), 3),
+                'p99_ms': round(percentile(latencies, 99), 3),
+                'peak_kib': round(peak, 1),
+            }
+    return results, failures
+
+
+def compare(results, baseline, threshold, tail_threshold=None):
+    """Regressions of `results` against `baseline` results, as messages.
+
+    Query counts may not grow at all; p50 and peak memory may grow by the
+    `threshold` fraction plus a small absolute slack. p99 rests on the one
+    or two slowest samples and swings with whatever else the machine is
+    doing, so it is only checked when `tail_threshold` is given. Cases
+    missing from the baseline are skipped.
+    """
+    limits = [('p50_ms', threshold, LATENCY_SLACK_MS), ('peak_kib', threshold, MEMORY_SLACK_KIB)]
+    if tail_threshold is not None:
+        limits.append(('p99_ms', tail_threshold, LATENCY_SLACK_MS))
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current['queries'] > previous['queries']:
+            regressions.append(f"{name}: {previous['queries']} -> {current['queries']} queries")
+        for metric, allowed, slack in limits:
+            if current[metric] > previous[metric] * (1 + allowed) + slack:
+                regressions.append(f'{name}: {metric} {previous[metric]} -> {current[metric]}')
+    return regressions
+
+
+def hot_statements(fixture):
+    """Every distinct SQL statement the cases run, with the first case that ran it."""
+    statements = {}
+    with clients_for(fixture) as clients:
+        for case in cases():
+            _, queries, _, _ = measure(case, clients[case.role], fixture, 0)
+            for query in queries:
+                statements.setdefault(query['sql'], case.name)
+    return statements
+
+
+def full_scans(sql):
+    """The tables a filtered statement scans instead of seeking into, from SQLite's query plan.
+
+    Statements without a WHERE clause read a whole table, or its first rows
+    in index order, on purpose (listings and counts), so only filtered ones
+    are checked; a scan there means no index matched the filter.
+    """
+    if ' WHERE ' not in sql or sql.split(None, 1)[0].upper() not in ('SELECT', 'UPDATE', 'DELETE'):
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        plan = [row[-1] for row in cursor.fetchall()]
+    tables = [match[1] for match in map(SCAN.fullmatch, plan) if match]
+    return [table for table in tables if table not in WHOLE_TABLE_READS and not table.startswith('sqlite_')]
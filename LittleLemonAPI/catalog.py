@@ -0,0 +1,104 @@
+import hashlib
+import time
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from .transactions import in_transaction
+
+VERSION_KEY = 'littlelemon:catalog-version'
+CATALOG_TIMEOUT = 60 * 60
+
+
+def get_version():
+    return cache.get_or_set(VERSION_KEY, time.time_ns, None)
+
+
+def bump_version():
+    """Invalidate every cached catalog response.
+
+    Every bump writes a fresh value rather than incrementing: `incr` is a
+    separate get and set on the file cache, so two workers bumping at once
+    could both write the same next version and a reader caching under it in
+    between would outlive the second bump.
+    """
+    cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def _lookup(request):
+    """Return the ETag and cache key of a catalog read, and whether and what is cached.
+
+    The cached content is not fetched when the client's copy is current.
+    """
+    version = get_version()
+    digest = hashlib.sha1(
+        f'{request.get_host()}|{request.get_full_path()}|{request.accepted_media_type}'.encode()
+    ).hexdigest()
+    etag = f'"{version}-{digest}"'
+    key = f'littlelemon:catalog:{version}:{digest}'
+    # Compressed responses carry the weak form of the ETag, which still
+    # names the same content.
+    if etag in {tag.removeprefix('W/') for tag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))}:
+        return etag, key, True, None
+    return etag, key, False, cache.get(key)
+
+
+def _render(request, built):
+    return request.accepted_renderer.render(built.data, request.accepted_media_type, {'request': request})
+
+
+def _respond(request, content, etag):
+    if content is None:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content, content_type=request.accepted_renderer.media_type)
+    response['ETag'] = etag
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+
+def catalog_response(request, build):
+    """Serve a catalog read from pre-rendered JSON keyed by catalog version.
+
+    `build` returns the DRF response to cache on a miss. The strong ETag is
+    derived from the version and the request, so a matching If-None-Match is
+    answered with a 304 before the ORM or the renderer are involved.
+    Inside a transaction, e.g. an atomic batch, the response is built but
+    not cached, as it may show writes that are rolled back.
+    """
+    if request.accepted_renderer.format != 'json':
+        return build()
+
+    etag, key, not_modified, content = _lookup(request)
+    if not_modified:
+        return _respond(request, None, etag)
+    if content is None:
+        built = build()
+        if built.status_code != 200:
+            return built
+        content = _render(request, built)
+        if not in_transaction():
+            cache.set(key, content, CATALOG_TIMEOUT)
+    return _respond(request, content, etag)
+
+
+async def acatalog_response(request, build):
+    """`catalog_response` for async views; `build` is a coroutine function.
+
+    The cache backends are synchronous, so the version and content lookups
+    share a single thread hop.
+    """
+    if request.accepted_renderer.format != 'json':
+        return await build()
+
+    etag, key, not_modified, content = await sync_to_async(_lookup)(request)
+    if not_modified:
+        return _respond(request, None, etag)
+    if content is None:
+        built = await build()
+        if built.status_code != 200:
+            return built
+        content = _render(request, built)
+        await cache.aset(key, content, CATALOG_TIMEOUT)
+    return _respond(request, content, etag)
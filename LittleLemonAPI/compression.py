@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Django's gzip middleware with a size threshold, leaving event streams alone.
+
+    Bodies shorter than COMPRESS_MIN_LENGTH fit in a packet or two anyway,
+    so compressing them costs CPU for no gain. Event streams are skipped
+    because each event would become its own gzip member, larger than the
+    event itself.
+    """
+
+    def process_response(self, request, response):
+        if response.get('Content-Type', '').startswith('text/event-stream'):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESS_MIN_LENGTH:
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import time
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max, Q
+from .fastserializers import fast_data
+from .models import OrderEvent
+from .permissions import is_delivery_crew, is_manager
+from .serializers import OrderEventSerializer
+
+# Order changes are appended to the OrderEvent log so clients can ask for
+# what happened since the last event they saw instead of re-listing orders.
+# The newest event id is kept in the cache; waiting clients watch that key
+# and only query the log once it moves past their cursor.
+
+LATEST_KEY = 'littlelemon:order-events:latest'
+EVENTS_PAGE_SIZE = 100
+MAX_WAIT = 25
+POLL_INTERVAL = 0.5
+STREAM_HEARTBEAT = 15
+
+
+def record_order_event(kind, order, previous_delivery_crew_id=None):
+    """Append an event for `order`, inside the caller's transaction."""
+    event = OrderEvent.objects.create(
+        order_id=order.pk, kind=kind, user_id=order.user_id, status=order.status,
+        delivery_crew_id=order.delivery_crew_id, previous_delivery_crew_id=previous_delivery_crew_id,
+    )
+    transaction.on_commit(lambda: cache.set(LATEST_KEY, event.pk, None))
+    return event
+
+
+def latest_event_id():
+    """The newest event id, from the cache when it is there.
+
+    The cached id is a hint: a commit can race a reader refilling the key,
+    so waiting clients still read the log when their wait runs out.
+    """
+    latest = cache.get(LATEST_KEY)
+    if latest is None:
+        latest = OrderEvent.objects.aggregate(latest=Max('id'))['latest'] or 0
+        # `add` so a refill never overwrites an id set by a later commit.
+        cache.add(LATEST_KEY, latest, None)
+    return latest
+
+
+def visible_events(request):
+    """The events `request.user` may see: all for managers, their deliveries for crew, their orders otherwise."""
+    events = OrderEvent.objects.order_by('id')
+    if is_manager(request):
+        return events
+    if is_delivery_crew(request):
+        return events.filter(Q(delivery_crew=request.user) | Q(previous_delivery_crew=request.user))
+    return events.filter(user=request.user)
+
+
+def events_page(events, since):
+    """The serialized events after `since`, oldest first, and the cursor to continue from."""
+    data = fast_data(OrderEventSerializer, events.filter(id__gt=since)[:EVENTS_PAGE_SIZE], many=True)
+    return data, data[-1]['id'] if data else since
+
+
+async def aevents_page(events, since):
+    page = [event async for event in events.filter(id__gt=since)[:EVENTS_PAGE_SIZE]]
+    data = fast_data(OrderEventSerializer, page, many=True)
+    return data, data[-1]['id'] if data else since
+
+
+async def await_events(after, timeout):
+    """Wait until an event newer than `after` is committed or `timeout` passes; return whether one was.
+
+    Only async views wait: a sync view would hold its worker thread for
+    the whole wait.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        latest = await cache.aget(LATEST_KEY)
+        if latest is None:
+            latest = await sync_to_async(latest_event_id)()
+        if latest > after:
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        await asyncio.sleep(min(POLL_INTERVAL, remaining))
+
+
+async def apoll_events(events, since, wait):
+    """`events_page`, waiting up to `wait` seconds for the first event if there is none yet.
+
+    The log is read again only when a newer event is committed, and events
+    other users can not see just move the watermark on.
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        watermark = await sync_to_async(latest_event_id)()
+        data, last_id = await aevents_page(events, since)
+        if data or not await await_events(max(watermark, since), deadline - time.monotonic()):
+            return data, last_id
+
+
+async def event_stream(events, since):
+    """Server-Sent Events for `events` after `since`, with a comment as heartbeat while idle."""
+    yield 'retry: 3000\n\n'
+    while True:
+        data, since = await apoll_events(events, since, STREAM_HEARTBEAT)
+        for event in data:
+            yield f"id: {event['id']}\nevent: order\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+        if not data:
+            yield ': keep-alive\n\n'
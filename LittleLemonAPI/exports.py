@@ -0,0 +1,93 @@
+import csv
+import heapq
+import json
+from itertools import islice
+from asgiref.sync import sync_to_async
+from .fastserializers import fast_data
+from .models import ArchivedOrder, Order
+from .queries import optimize_queryset
+from .serializers import ArchivedOrderSerializer, OrderSerializer
+
+EXPORT_CHUNK_SIZE = 500
+
+CSV_HEADER = [
+    'order_id', 'date', 'user_id', 'username', 'delivery_crew_id', 'status', 'total',
+    'order_item_id', 'menuitem_id', 'menuitem_title', 'quantity', 'unit_price', 'price',
+]
+
+
+def _export(model, serializer_class, start, end, chunk_size):
+    orders = model.objects.order_by('date', 'id')
+    if start is not None:
+        orders = orders.filter(date__gte=start)
+    if end is not None:
+        orders = orders.filter(date__lte=end)
+    for order in optimize_queryset(orders, serializer_class).iterator(chunk_size=chunk_size):
+        yield fast_data(serializer_class, order)
+
+
+def export_orders(start=None, end=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield the orders dated `start`..`end` (inclusive) with their items, oldest first.
+
+    Live and archived orders are read side by side and merged, so the
+    export covers every order. Rows are fetched `chunk_size` at a time and
+    the items of each chunk are prefetched together, so memory use is
+    bounded by the chunk size, not by the size of the range. Each range is
+    a seek on its table's `(date, id)` index.
+    """
+    yield from heapq.merge(
+        _export(Order, OrderSerializer, start, end, chunk_size),
+        _export(ArchivedOrder, ArchivedOrderSerializer, start, end, chunk_size),
+        key=lambda order: (order['date'], order['id']),
+    )
+
+
+def ndjson_lines(orders):
+    """One JSON document per order, as served by `/api/orders`."""
+    for order in orders:
+        yield json.dumps(order, separators=(',', ':')) + '\n'
+
+
+class _Line:
+    def write(self, value):
+        return value
+
+
+def csv_lines(orders):
+    """One CSV row per order item; orders without items get a single row."""
+    writer = csv.writer(_Line())
+    yield writer.writerow(CSV_HEADER)
+    for order in orders:
+        crew = order['delivery_crew']
+        head = [
+            order['id'], order['date'], order['user']['id'], order['user']['username'],
+            crew['id'] if crew else '', order['status'], order['total'],
+        ]
+        if not order['order_items']:
+            yield writer.writerow(head + [''] * 6)
+        for item in order['order_items']:
+            menuitem = item['menuitem']
+            yield writer.writerow(head + [
+                item['id'], menuitem['id'], menuitem['title'], item['quantity'], item['unit_price'], item['price'],
+            ])
+
+
+EXPORT_FORMATS = {'ndjson': ndjson_lines, 'csv': csv_lines}
+
+
+def batched(lines, size=100):
+    """Join `lines` into chunks of `size`, so each write to the client carries many rows."""
+    lines = iter(lines)
+    while chunk := list(islice(lines, size)):
+        yield ''.join(chunk)
+
+
+async def abatched(lines, size=100):
+    """`batched` for ASGI servers, which would otherwise buffer a sync iterator whole.
+
+    Each chunk is pulled in the request's thread, where the export cursor lives.
+    """
+    lines = iter(lines)
+    take = sync_to_async(lambda: list(islice(lines, size)))
+    while chunk := await take():
+        yield ''.join(chunk)
@@ -0,0 +1,142 @@
+from datetime import date
+from decimal import Decimal
+from functools import lru_cache
+from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist
+from django.db.models import Manager
+from rest_framework import ISO_8601, serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
+from rest_framework.settings import api_settings
+
+# DRF's `to_representation` resolves, checks and converts every field of every
+# row through several method calls. For the read-only shapes of the listings
+# the work per field is known up front, so it is compiled once per serializer.
+# Any field the compiler does not recognise keeps DRF's own code, so the
+# output is always the same.
+
+
+def _model_attribute(serializer, field):
+    """The attribute `field` reads, if it is a plain model field of the serializer's model."""
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    if model is None or len(field.source_attrs) != 1 or isinstance(field, serializers.RelatedField):
+        return None
+    try:
+        model._meta.get_field(field.source)
+    except FieldDoesNotExist:
+        return None
+    return field.source
+
+
+def _converter(field):
+    """Return `(convert, expression)` for a field's non-null values.
+
+    `expression` is the conversion inlined as Python source over `value`
+    (with `convert` bound as `convert`), or None to call `convert`.
+    """
+    if isinstance(field, serializers.ListSerializer) and isinstance(field.child, serializers.Serializer):
+        child = compile_serializer(field.child)
+
+        def convert(value):
+            if isinstance(value, Manager):
+                value = value.all()
+            return [child(item) for item in value]
+        return convert, None
+    if isinstance(field, serializers.Serializer):
+        return compile_serializer(field), None
+
+    kind = type(field)
+    fallback = field.to_representation
+    if kind is serializers.IntegerField:
+        return fallback, 'int(value)'
+    if kind in (serializers.CharField, serializers.EmailField, serializers.SlugField):
+        return fallback, 'str(value)'
+    if kind is serializers.BooleanField:
+        return fallback, '(value if value is True or value is False else convert(value))'
+    if kind is serializers.DateField and getattr(field, 'format', api_settings.DATE_FORMAT) == ISO_8601:
+        return fallback, '(value.isoformat() if type(value) is date else convert(value))'
+    if (
+        kind is serializers.DecimalField
+        and getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+        and not field.localize
+        and not field.normalize_output
+        and field.decimal_places is not None
+    ):
+        # Values read from a DecimalField column already carry the field's
+        # decimal places, so quantizing them would be a no-op. `str` gives the
+        # same fixed-point text for them, and any other value (wrong number of
+        # places, or scientific notation) fails the check and is quantized.
+        places = field.decimal_places
+        check = f"text[{-places - 1}:{-places}] == '.'" if places else "'.' not in text and 'E' not in text"
+        return fallback, f"(text if type(value) is Decimal and {check.replace('text', '(text := str(value))', 1)} else convert(value))"
+    return fallback, None
+
+
+def _represent_fields(fields):
+    """DRF's `Serializer.to_representation` over precomputed `fields`."""
+    def represent(instance):
+        ret = {}
+        for field, convert in fields:
+            try:
+                attribute = field.get_attribute(instance)
+            except SkipField:
+                continue
+            check_for_none = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+            ret[field.field_name] = None if check_for_none is None else convert(attribute)
+        return ret
+    return represent
+
+
+def compile_serializer(serializer):
+    """Compile `serializer`'s fields into a function of instance -> representation.
+
+    The function returns exactly what `serializer.to_representation` would,
+    for the fields `serializer` has when it is compiled. When every field is
+    a plain model attribute, the function is generated as straight-line code
+    that reads each attribute once and converts it inline.
+    """
+    fields = [(field, _converter(field)) for field in serializer._readable_fields]
+    represent = _represent_fields([(field, convert) for field, (convert, _) in fields])
+    attributes = [_model_attribute(serializer, field) for field, _ in fields]
+    if None in attributes:
+        return represent
+
+    namespace = {'Decimal': Decimal, 'date': date, 'ObjectDoesNotExist': ObjectDoesNotExist, 'represent': represent}
+    reads, items = [], []
+    for index, ((field, (convert, expression)), attribute) in enumerate(zip(fields, attributes)):
+        namespace[f'convert_{index}'] = convert
+        value = f'value_{index}'
+        expression = (expression or 'convert(value)').replace('convert', f'convert_{index}').replace('value', value)
+        reads.append(f'        {value} = instance.{attribute}')
+        items.append(f'        {field.field_name!r}: None if {value} is None else {expression},')
+    source = '\n'.join([
+        'def fast_represent(instance):',
+        '    try:',
+        *reads,
+        '    except ObjectDoesNotExist:',
+        '        return represent(instance)',
+        '    return {',
+        *items,
+        '    }',
+    ])
+    exec(compile(source, f'<{type(serializer).__name__} representation>', 'exec'), namespace)
+    return namespace['fast_represent']
+
+
+# Bounded because request-shaped serializers (see fieldsets) come and go.
+@lru_cache(maxsize=1024)
+def _compiled(serializer_class):
+    return compile_serializer(serializer_class())
+
+
+def fast_data(serializer_class, instance, many=False):
+    """Serialize `instance` (or, with `many`, an iterable of instances) for output.
+
+    A drop-in for `serializer_class(instance, many=many).data` on read paths;
+    the result is plain dicts and lists.
+    """
+    represent = _compiled(serializer_class)
+    if many:
+        if isinstance(instance, Manager):
+            instance = instance.all()
+        return [represent(item) for item in instance]
+    return represent(instance)
@@ -0,0 +1,85 @@
+from functools import lru_cache
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+
+# `?fields=` and `?expand=` reshape a read serializer per request. Without
+# either parameter the output keeps its full nested shape. With one of them,
+# only the listed fields are rendered, and a nested object (a foreign key
+# rendered by a nested serializer) collapses to its id unless it is listed in
+# `expand` or a dotted name below it is listed in either parameter. Nested
+# lists, like an order's items, belong to the resource and stay objects.
+# For example `?fields=id,order_items.quantity&expand=order_items.menuitem`.
+#
+# A shape is a subclass of the serializer, so `optimize_queryset` only plans
+# the joins and prefetches it still reads and `fast_data` compiles it like
+# any other serializer. Collapsed objects read the `<name>_id` column.
+
+SHAPE_CACHE_SIZE = 256
+
+
+def _split(paths, name):
+    """The parts of the dotted `paths` below `name`."""
+    return frozenset(path.split('.', 1)[1] for path in paths if path.startswith(name + '.'))
+
+
+def _reshape(fields, wanted, expand, prefix):
+    readable = {name: field for name, field in fields.items() if not field.write_only}
+    nested = {
+        name for name, field in readable.items()
+        if isinstance(field.child if isinstance(field, serializers.ListSerializer) else field, serializers.ModelSerializer)
+    }
+    top = None if wanted is None else {path.split('.', 1)[0] for path in wanted}
+    unknown = sorted((top or set()) - set(readable))
+    if unknown:
+        raise ParseError(f'Unknown field "{prefix}{unknown[0]}".')
+    unexpandable = sorted({path.split('.', 1)[0] for path in expand} - nested)
+    if unexpandable:
+        raise ParseError(f'"{prefix}{unexpandable[0]}" can not be expanded.')
+
+    shaped = {}
+    for name, field in fields.items():
+        if field.write_only:
+            shaped[name] = field
+            continue
+        if top is not None and name not in top:
+            continue
+        if name not in nested:
+            shaped[name] = field
+            continue
+        child_wanted = _split(wanted, name) if wanted is not None else frozenset()
+        child_expand = _split(expand, name)
+        many = isinstance(field, serializers.ListSerializer)
+        source = field.source or name
+        if many or name in expand or child_expand or child_wanted:
+            child = field.child if many else field
+            kwargs = {'source': source} if source != name else {}
+            shape = _shaped(type(child), child_wanted or None, child_expand, f'{prefix}{name}.')
+            shaped[name] = shape(many=many, read_only=True, **kwargs)
+        else:
+            shaped[name] = serializers.IntegerField(source=f'{source}_id', read_only=True)
+    return shaped
+
+
+@lru_cache(maxsize=SHAPE_CACHE_SIZE)
+def _shaped(serializer_class, wanted, expand, prefix=''):
+    def get_fields(self):
+        return _reshape(super(shape, self).get_fields(), wanted, expand, prefix)
+
+    shape = type(serializer_class.__name__, (serializer_class,), {'get_fields': get_fields, '__module__': __name__})
+    # Unknown names fail here, before the shape is cached.
+    shape().fields
+    return shape
+
+
+def _paths(request, param):
+    return frozenset(filter(None, (path.strip() for path in request.query_params.get(param, '').split(','))))
+
+
+def sparse_serializer(serializer_class, request):
+    """`serializer_class` reshaped by the request's `?fields=` and `?expand=`, or unchanged without them.
+
+    Raises `ParseError` for names the serializer does not have.
+    """
+    if 'fields' not in request.query_params and 'expand' not in request.query_params:
+        return serializer_class
+    return _shaped(serializer_class, _paths(request, 'fields') or None, _paths(request, 'expand'))
@@ -0,0 +1,72 @@
+import re
+import django_filters
+from django.db import connections
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import SearchFilter
+from .models import MenuItem, Order
+
+MENUITEM_FTS_TABLE = 'LittleLemonAPI_menuitem_fts'
+
+_fts_available = {}
+
+
+def fts_available(alias):
+    """Whether the menu full-text index exists on the database `alias`."""
+    if alias not in _fts_available:
+        connection = connections[alias]
+        _fts_available[alias] = (
+            connection.vendor == 'sqlite'
+            and MENUITEM_FTS_TABLE in connection.introspection.table_names()
+        )
+    return _fts_available[alias]
+
+
+def filter_flag(queryset, name, value):
+    # `flag=False` compiles to `NOT flag` on SQLite, and `flag=True` to the
+    # bare column, neither of which an index serves; `flag IN (0)` is an
+    # equality the indexes match.
+    return queryset.filter(**{f'{name}__in': [value]})
+
+
+class MenuItemFilter(django_filters.FilterSet):
+    category = django_filters.CharFilter(field_name='category__title')
+    featured = django_filters.BooleanFilter(method=filter_flag, widget=django_filters.widgets.BooleanWidget())
+
+    class Meta:
+        model = MenuItem
+        fields = ['category', 'category_id', 'featured']
+
+
+class OrderFilter(django_filters.FilterSet):
+    status = django_filters.BooleanFilter(method=filter_flag, widget=django_filters.widgets.BooleanWidget())
+
+    class Meta:
+        model = Order
+        fields = ['status']
+
+
+class MenuItemSearchFilter(SearchFilter):
+    """Prefix search over menu item and category titles.
+
+    On SQLite the terms are matched against the FTS5 index kept in sync by
+    the triggers from migration 0003, so latency does not grow with the
+    menu. Other databases fall back to the view's `search_fields`.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if not fts_available(queryset.db):
+            return super().filter_queryset(request, queryset, view)
+
+        tokens = [
+            token
+            for term in self.get_search_terms(request)
+            for token in re.findall(r'\w+', term)
+        ]
+        if not tokens:
+            return queryset
+
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM "{MENUITEM_FTS_TABLE}" WHERE "{MENUITEM_FTS_TABLE}" MATCH %s',
+            [match],
+        ))
@@ -0,0 +1,26 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from LittleLemonAPI.archive import ARCHIVE_BATCH_SIZE, archive_orders
+
+
+class Command(BaseCommand):
+    help = (
+        "Move delivered orders older than ORDER_ARCHIVE_AFTER_DAYS into the archive tables, one short "
+        "transaction per batch. Safe to interrupt and re-run, e.g. nightly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.ORDER_ARCHIVE_AFTER_DAYS, help='archive orders dated more than this many days ago')
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE, help='orders moved per transaction')
+        parser.add_argument('--pause', type=float, default=0, help='seconds to wait between batches')
+
+    def handle(self, *args, **options):
+        before = timezone.now().date() - timedelta(days=options['days'])
+        started = time.perf_counter()
+        moved = archive_orders(before, options['batch_size'], options['pause'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {moved} delivered orders dated before {before} in {time.perf_counter() - started:.1f} s.'
+        ))
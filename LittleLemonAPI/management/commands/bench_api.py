@@ -0,0 +1,58 @@
+import json
+import time
+from django.core.management.base import BaseCommand, CommandError
+from LittleLemonAPI.benchmarks import FULL_SCALE, compare, run, scratch_database, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a scratch database with 10k menu items, 100k orders and 1k users, drive every API route "
+        "through the test client, and fail if a route exceeds its query budget or, with --compare, "
+        "regresses against a stored baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0, help='fraction of the full dataset to seed')
+        parser.add_argument('--iterations', type=int, default=20, help='timed requests per route')
+        parser.add_argument('--route', action='append', dest='routes', help='only run this case, e.g. "GET api/orders [manager]"')
+        parser.add_argument('--output', help='write the results to this JSON file, to use as a baseline')
+        parser.add_argument('--compare', help='baseline JSON file to compare the results with')
+        parser.add_argument(
+            '--threshold', type=float, default=0.25,
+            help='allowed growth of p50 and peak memory over the baseline (default 0.25 = 25%%)',
+        )
+        parser.add_argument('--tail-threshold', type=float, help='also fail when p99 grows by more than this fraction')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+
+        sizes = {name: max(int(size * options['scale']), 1) for name, size in FULL_SCALE.items()}
+        with scratch_database():
+            started = time.perf_counter()
+            fixture = seed(spares=options['iterations'] + 1, **sizes)
+            self.stderr.write(f'Seeded {sizes} in {time.perf_counter() - started:.1f} s')
+            results, failures = run(fixture, options['iterations'], options['routes'])
+
+        self.stdout.write(f"{'route':<62} {'queries':>7} {'budget':>6} {'p50 ms':>8} {'p99 ms':>8} {'peak KiB':>9}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<62} {result['queries']:>7} {result['budget']:>6} {result['p50_ms']:>8.2f} "
+                f"{result['p99_ms']:>8.2f} {result['peak_kib']:>9.1f}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({'scale': sizes, 'iterations': options['iterations'], 'routes': results}, f, indent=2)
+                f.write('\n')
+
+        if baseline is not None:
+            if baseline['scale'] != sizes:
+                self.stderr.write(self.style.WARNING(f"Baseline was recorded at {baseline['scale']}, not {sizes}"))
+            failures += compare(results, baseline['routes'], options['threshold'], options['tail_threshold'])
+        if failures:
+            raise CommandError('Performance regressions:\n' + '\n'.join(failures))
+        checked = 'their query budgets and the baseline' if baseline is not None else 'their query budgets'
+        self.stdout.write(self.style.SUCCESS(f'All routes within {checked}.'))
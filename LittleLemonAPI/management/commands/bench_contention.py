@@ -0,0 +1,99 @@
+import statistics
+import threading
+import time
+from decimal import Decimal
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections
+from django.test import override_settings
+from LittleLemonAPI.fastserializers import fast_data
+from LittleLemonAPI.models import Category, MenuItem
+from LittleLemonAPI.queries import optimize_queryset
+from LittleLemonAPI.serializers import MenuItemSerializer
+from LittleLemonAPI.services import add_to_cart, checkout
+
+
+class Command(BaseCommand):
+    help = (
+        "Run checkouts and menu reads concurrently against a scratch copy of the schema and "
+        "report throughput and lock errors, with the production SQLite profile or with --baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=5.0)
+        parser.add_argument(
+            '--baseline', action='store_true',
+            help="Use SQLite's defaults: rollback journal, deferred transactions and a 5 s busy timeout.",
+        )
+
+    def handle(self, *args, **options):
+        # The test database machinery gives a migrated scratch file, so the
+        # benchmark never touches the real data.
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        saved_options = dict(connection.settings_dict['OPTIONS'])
+        try:
+            if options['baseline']:
+                connection.settings_dict['OPTIONS'] = {}
+                pragmas = {'journal_mode': 'delete'}
+            else:
+                pragmas = settings.SQLITE_PRAGMAS
+            connections.close_all()
+            with override_settings(SQLITE_PRAGMAS=pragmas):
+                self.run(options)
+        finally:
+            connections.close_all()
+            connection.settings_dict['OPTIONS'] = saved_options
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def run(self, options):
+        category = Category.objects.create(slug='bench', title='Bench')
+        menuitems = MenuItem.objects.bulk_create([
+            MenuItem(title=f'Dish {n}', price=Decimal('4.50'), featured=False, category=category) for n in range(200)
+        ])
+        writers = [User.objects.create_user(f'bench-writer-{n}') for n in range(options['writers'])]
+        connections.close_all()
+
+        deadline = time.perf_counter() + options['duration']
+        results = {'checkout': ([], [0]), 'menu read': ([], [0])}
+
+        def write(user):
+            entries = [{'menuitem_id': item.pk, 'quantity': 2} for item in menuitems[user.pk % 50:][:5]]
+            self.loop(deadline, results['checkout'], lambda: (add_to_cart(user, entries), checkout(user)))
+
+        def read():
+            self.loop(deadline, results['menu read'], lambda: fast_data(
+                MenuItemSerializer, optimize_queryset(MenuItem.objects.order_by('id'), MenuItemSerializer)[:50], many=True
+            ))
+
+        threads = [threading.Thread(target=write, args=[user]) for user in writers]
+        threads += [threading.Thread(target=read) for _ in range(options['readers'])]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(f"{'operation':>10} {'ops/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'lock errors':>12}")
+        for label, (latencies, errors) in results.items():
+            cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [float('nan')] * 99
+            self.stdout.write(
+                f'{label:>10} {len(latencies) / elapsed:>9.1f} {cuts[49] * 1000:>8.1f} {cuts[98] * 1000:>8.1f} {errors[0]:>12}'
+            )
+
+    def loop(self, deadline, result, operation):
+        latencies, errors = result
+        try:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    operation()
+                except OperationalError:
+                    errors[0] += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+        finally:
+            connections.close_all()
@@ -0,0 +1,70 @@
+import gzip
+import time
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from LittleLemonAPI.benchmarks import FULL_SCALE, clients_for, scratch_database, seed
+from LittleLemonAPI.renderers import FastJSONRenderer, orjson
+from LittleLemonAPI.services import add_to_cart
+
+
+class Command(BaseCommand):
+    help = (
+        "Fetch the order and cart listings from a seeded scratch database and report their size "
+        "with and without gzip, and the CPU time of DRF's JSONRenderer and FastJSONRenderer on them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=0.01, help='fraction of the bench_api dataset to seed')
+        parser.add_argument('--cart-items', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=200, help='renders per round; the best of 5 rounds is reported')
+
+    def handle(self, *args, **options):
+        sizes = {name: max(int(size * options['scale']), 1) for name, size in FULL_SCALE.items()}
+        with scratch_database():
+            fixture = seed(**sizes)
+            customer = fixture['users']['customer']
+            add_to_cart(customer, [{'menuitem_id': item.pk, 'quantity': 2} for item in fixture['items'][:options['cart_items']]])
+            with clients_for(fixture) as clients:
+                payloads = [
+                    (f"{label} [{role}]", self.fetch(clients[role], path))
+                    for label, role, path in [
+                        ('GET /api/orders', 'manager', '/api/orders'),
+                        ('GET /api/orders', 'customer', '/api/orders'),
+                        ('GET /api/cart/menu-items', 'customer', '/api/cart/menu-items'),
+                    ]
+                ]
+
+        encoder = 'orjson' if orjson is not None else 'json'
+        self.stdout.write(
+            f"{'response':<36} {'bytes':>7} {'gzip':>6} {'ratio':>6} {'DRF µs':>8} {f'fast ({encoder}) µs':>16}"
+        )
+        drf, fast = JSONRenderer(), FastJSONRenderer()
+        for label, (data, plain, compressed) in payloads:
+            if drf.render(data) != fast.render(data):
+                raise CommandError(f'{label}: renderer outputs differ')
+            timings = self.measure([drf, fast], data, options['repeat'])
+            self.stdout.write(
+                f'{label:<36} {plain:>7} {compressed:>6} {plain / compressed:>5.1f}x '
+                f'{timings[0] * 1e6:>8.1f} {timings[1] * 1e6:>16.1f}'
+            )
+
+    def fetch(self, client, path):
+        plain = client.get(path)
+        compressed = client.get(path, HTTP_ACCEPT_ENCODING='gzip')
+        if plain.status_code != 200 or compressed.get('Content-Encoding') != 'gzip':
+            raise CommandError(f'{path}: status {plain.status_code}, Content-Encoding {compressed.get("Content-Encoding")}')
+        if gzip.decompress(compressed.content) != plain.content:
+            raise CommandError(f'{path}: gzipped body differs')
+        return plain.data, len(plain.content), len(compressed.content)
+
+    def measure(self, renderers, data, repeat):
+        # Rounds alternate between the renderers so drift in machine load
+        # hits both alike.
+        best = [float('inf')] * len(renderers)
+        for _ in range(5):
+            for n, renderer in enumerate(renderers):
+                start = time.process_time()
+                for _ in range(repeat):
+                    renderer.render(data)
+                best[n] = min(best[n], (time.process_time() - start) / repeat)
+        return best
@@ -0,0 +1,63 @@
+import time
+from datetime import date
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from LittleLemonAPI.fastserializers import fast_data
+from LittleLemonAPI.models import Category, MenuItem, Order, OrderItem
+from LittleLemonAPI.serializers import OrderSerializer
+
+
+class Command(BaseCommand):
+    help = "Compare the CPU time of OrderSerializer and its compiled fast path on in-memory orders."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=1000)
+        parser.add_argument('--items', type=int, default=3, help='order items per order')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        orders = self.build_orders(options['orders'], options['items'])
+        drf = lambda: OrderSerializer(orders, many=True).data
+        fast = lambda: fast_data(OrderSerializer, orders, many=True)
+
+        renderer = JSONRenderer()
+        if renderer.render(drf()) != renderer.render(fast()):
+            raise CommandError('OrderSerializer and its fast path render different output')
+
+        timings = {label: self.measure(serialize, options['repeat']) for label, serialize in [('DRF', drf), ('fast', fast)]}
+        for label, timing in timings.items():
+            self.stdout.write(f'{label:>5} {timing * 1000:8.1f} ms per {len(orders)} orders')
+        self.stdout.write(f'speedup {timings["DRF"] / timings["fast"]:.1f}x')
+
+    def build_orders(self, count, items):
+        # Instances are wired up the way select_related/prefetch_related
+        # leave them, so no query runs while serializing.
+        category = Category(pk=1, slug='mains', title='Mains')
+        customer = User(pk=1, username='customer', email='customer@example.com')
+        crew = User(pk=2, username='delivery', email='delivery@example.com')
+        menuitems = [
+            MenuItem(pk=n, title=f'Dish {n}', price=Decimal('5.50'), featured=bool(n % 2), category=category)
+            for n in range(1, items + 1)
+        ]
+        orders = []
+        for pk in range(1, count + 1):
+            order = Order(
+                pk=pk, user=customer, delivery_crew=crew if pk % 2 else None, status=bool(pk % 3),
+                total=Decimal('5.50') * items, date=date(2025, 1, 1 + pk % 28)
+            )
+            order._prefetched_objects_cache = {'order_items': [
+                OrderItem(pk=pk * items + n, order=order, menuitem=menuitem, quantity=1, unit_price=menuitem.price, price=menuitem.price)
+                for n, menuitem in enumerate(menuitems)
+            ]}
+            orders.append(order)
+        return orders
+
+    def measure(self, serialize, repeat):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.process_time()
+            serialize()
+            best = min(best, time.process_time() - start)
+        return best
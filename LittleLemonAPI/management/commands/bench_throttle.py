@@ -0,0 +1,48 @@
+import tempfile
+import time
+from django.contrib.auth.models import User
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework.throttling import UserRateThrottle
+from LittleLemonAPI.throttling import UserTokenBucketThrottle
+
+
+class Command(BaseCommand):
+    help = "Measure the per-request overhead of DRF's cache throttle against the token bucket store."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        request = Request(APIRequestFactory().get('/api/menu-items'))
+        request.user = User(pk=1, username='bench')
+
+        rates = {'user': f'{count}/day'}
+
+        class HistoryThrottle(UserRateThrottle):
+            cache = LocMemCache('bench-throttle', {})
+            THROTTLE_RATES = rates
+
+        with tempfile.TemporaryDirectory() as directory:
+            config = {'DEFAULT_THROTTLE_RATES': rates}
+            with override_settings(REST_FRAMEWORK=config, THROTTLE_DATABASE=f'{directory}/throttle.sqlite3'):
+                self.report('DRF UserRateThrottle (LocMem history)', HistoryThrottle, request, count)
+                self.report('UserTokenBucketThrottle (SQLite store)', UserTokenBucketThrottle, request, count)
+
+    def report(self, label, throttle_class, request, count):
+        # Timings are split into quarters to show how the cost of a check
+        # moves as the client's request history grows.
+        quarter = count // 4
+        timings = []
+        for _ in range(4):
+            start = time.perf_counter()
+            for _ in range(quarter):
+                throttle_class().allow_request(request, None)
+            timings.append((time.perf_counter() - start) / quarter * 1e6)
+        self.stdout.write(f'{label}')
+        for index, timing in enumerate(timings, 1):
+            self.stdout.write(f'  requests {(index - 1) * quarter:>6}-{index * quarter:<6} {timing:8.1f} us/check')
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from LittleLemonAPI.benchmarks import FULL_SCALE, full_scans, hot_statements, scratch_database, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Run every API route against a seeded scratch database, EXPLAIN QUERY PLAN each SQL "
+        "statement they issue, and fail if a filtered statement scans a table instead of using an index."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=0.01, help='fraction of the bench_api dataset to seed')
+
+    def handle(self, *args, **options):
+        sizes = {name: max(int(size * options['scale']), 1) for name, size in FULL_SCALE.items()}
+        with scratch_database():
+            statements = hot_statements(seed(**sizes))
+            problems = []
+            for sql, case in statements.items():
+                scanned = full_scans(sql)
+                if scanned:
+                    problems.append(f"{case}: full scan of {', '.join(scanned)}\n  {sql}")
+                if options['verbosity'] > 1:
+                    with connection.cursor() as cursor:
+                        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                        plan = '\n'.join(f'    {row[-1]}' for row in cursor.fetchall())
+                    self.stdout.write(f'{case}\n  {sql}\n{plan}')
+
+        if problems:
+            raise CommandError('Unindexed queries:\n' + '\n'.join(problems))
+        self.stdout.write(self.style.SUCCESS(f'{len(statements)} statements checked, none scans a table.'))
@@ -0,0 +1,27 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from LittleLemonAPI.exports import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, batched, export_orders
+
+
+class Command(BaseCommand):
+    help = "Write every order dated between --start and --end, with its items, as NDJSON or CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help='first day, YYYY-MM-DD')
+        parser.add_argument('--end', type=date.fromisoformat, help='last day, YYYY-MM-DD')
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='ndjson')
+        parser.add_argument('--output', default='-', help='file to write, or - for stdout')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options['start'] and options['end'] and options['start'] > options['end']:
+            raise CommandError('--start is after --end')
+        orders = export_orders(options['start'], options['end'], chunk_size=options['chunk_size'])
+        chunks = batched(EXPORT_FORMATS[options['format']](orders))
+        if options['output'] == '-':
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+            for chunk in chunks:
+                output.write(chunk)
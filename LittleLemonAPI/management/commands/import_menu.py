@@ -0,0 +1,37 @@
+import json
+import sys
+from io import BytesIO
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ParseError
+from LittleLemonAPI.parsers import CSVParser
+from LittleLemonAPI.services import InvalidImport, import_menu
+
+
+class Command(BaseCommand):
+    help = "Create or update menu items from a CSV (with a header row) or JSON list; rows with an id update that item."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='file to read, or - for stdin')
+        parser.add_argument('--format', choices=['csv', 'json'], help='defaults to the file extension')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if path == '-':
+            content = sys.stdin.buffer.read()
+        else:
+            with open(path, 'rb') as source:
+                content = source.read()
+        file_format = options['format'] or ('json' if path.endswith('.json') else 'csv')
+
+        try:
+            if file_format == 'json':
+                rows = json.loads(content)
+            else:
+                rows = CSVParser().parse(BytesIO(content))
+            created, updated = import_menu(rows)
+        except InvalidImport as exc:
+            lines = [f"row {error['row']}: {json.dumps(error['errors'])}" for error in exc.errors]
+            raise CommandError('Nothing was imported:\n' + '\n'.join(lines))
+        except (ValueError, ParseError) as exc:
+            raise CommandError(f'Could not read {path}: {exc}')
+        self.stdout.write(self.style.SUCCESS(f'Created {len(created)} and updated {len(updated)} menu items.'))
@@ -0,0 +1,103 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive a running server with concurrent keep-alive clients and report throughput and latency. "
+        "Run it once against the WSGI server and once against the ASGI server to compare them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='e.g. http://127.0.0.1:8000/api/menu-items')
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[50, 200, 1000])
+        parser.add_argument('--duration', type=float, default=10.0, help='seconds per concurrency level')
+        parser.add_argument('--token', help='send "Authorization: Token <token>"')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError('Only plain http:// URLs are supported')
+        target = (url.hostname, url.port or 80, url.path + (f'?{url.query}' if url.query else ''))
+
+        headers = [f'Host: {url.netloc}', 'Accept: application/json', 'Connection: keep-alive']
+        if options['token']:
+            headers.append(f"Authorization: Token {options['token']}")
+        request = (f'GET {target[2]} HTTP/1.1\r\n' + '\r\n'.join(headers) + '\r\n\r\n').encode('latin-1')
+
+        self.stdout.write(f"{'clients':>8} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        for concurrency in options['concurrency']:
+            latencies, errors, elapsed = asyncio.run(
+                self.run_level(target, request, concurrency, options['duration'])
+            )
+            if len(latencies) > 1:
+                cuts = statistics.quantiles(latencies, n=100)
+                p50, p99 = cuts[49] * 1000, cuts[98] * 1000
+            else:
+                p50 = p99 = float('nan')
+            self.stdout.write(
+                f'{concurrency:>8} {len(latencies) / elapsed:>10.1f} {p50:>9.1f} {p99:>9.1f} {errors:>7}'
+            )
+
+    async def run_level(self, target, request, concurrency, duration):
+        latencies = []
+        errors = [0]
+        deadline = time.perf_counter() + duration
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            self.client(target, request, deadline, latencies, errors) for _ in range(concurrency)
+        ])
+        return latencies, errors[0], time.perf_counter() - start
+
+    async def client(self, target, request, deadline, latencies, errors):
+        host, port, _ = target
+        reader = writer = None
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(host, port)
+                writer.write(request)
+                await writer.drain()
+                status, keep_alive = await self.read_response(reader)
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                errors[0] += 1
+                writer = self.close(writer)
+                await asyncio.sleep(0.01)
+                continue
+            if status == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors[0] += 1
+            if not keep_alive:
+                writer = self.close(writer)
+        self.close(writer)
+
+    async def read_response(self, reader):
+        head = await reader.readuntil(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        status = int(lines[0].split()[1])
+        fields = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                fields[name.strip().lower()] = value.strip().lower()
+        if 'content-length' in fields:
+            await reader.readexactly(int(fields['content-length']))
+            return status, fields.get('connection') != 'close'
+        if fields.get('transfer-encoding') == 'chunked':
+            while True:
+                size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    return status, fields.get('connection') != 'close'
+        await reader.read()
+        return status, False
+
+    def close(self, writer):
+        if writer is not None:
+            writer.close()
+        return None
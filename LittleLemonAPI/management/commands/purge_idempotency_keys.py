@@ -0,0 +1,18 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from LittleLemonAPI.services import purge_idempotency_keys
+
+
+class Command(BaseCommand):
+    help = "Delete stored Idempotency-Key responses older than IDEMPOTENCY_KEY_TTL_HOURS, e.g. nightly."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=settings.IDEMPOTENCY_KEY_TTL_HOURS, help='keep keys created within this many hours')
+        parser.add_argument('--batch-size', type=int, default=1000, help='keys deleted per transaction')
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(hours=options['hours'])
+        purged = purge_idempotency_keys(before, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} idempotency keys created before {before:%Y-%m-%d %H:%M}.'))
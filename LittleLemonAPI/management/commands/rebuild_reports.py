@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from LittleLemonAPI.reports import compute_reports, rebuild_reports, stored_reports
+
+
+class Command(BaseCommand):
+    help = "Rebuild the manager report aggregates from the full order history."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true',
+            help="Compare the stored aggregates with a from-scratch rebuild instead of replacing them.",
+        )
+
+    def handle(self, *args, **options):
+        if not options['verify']:
+            rebuild_reports()
+            self.stdout.write(self.style.SUCCESS('Report aggregates rebuilt.'))
+            return
+
+        drift = []
+        for name, expected, stored in zip(('revenue', 'menu item sales', 'delivery crew'), compute_reports(), stored_reports()):
+            for key in sorted(set(expected) | set(stored), key=str):
+                if expected.get(key) != stored.get(key):
+                    drift.append(f'{name} {key}: expected {expected.get(key)}, stored {stored.get(key)}')
+        if drift:
+            raise CommandError('Report aggregates have drifted:\n' + '\n'.join(drift))
+        self.stdout.write(self.style.SUCCESS('Report aggregates match the order history.'))
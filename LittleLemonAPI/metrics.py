@@ -0,0 +1,161 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+SLOW_REQUEST_STATEMENTS = 100
+
+METRICS = (
+    ('request_duration_seconds', 'Request latency, including rendering.', LATENCY_BUCKETS),
+    ('db_queries', 'SQL statements executed per request.', QUERY_BUCKETS),
+    ('db_duration_seconds', 'Time spent executing SQL per request.', LATENCY_BUCKETS),
+    ('render_duration_seconds', 'Time spent rendering the response body.', LATENCY_BUCKETS),
+)
+
+
+class Histogram:
+    """Cumulative-bucket histogram of fixed size, safe to update from several threads."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def snapshot(self):
+        with self.lock:
+            counts, total = list(self.counts), self.sum
+        cumulative, running = [], 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, total
+
+
+class Registry:
+    """Histograms per (route, method). Routes come from the URLconf, so the size is bounded."""
+
+    def __init__(self):
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def histograms(self, route, method):
+        key = (route, method)
+        histograms = self.series.get(key)
+        if histograms is None:
+            with self.lock:
+                histograms = self.series.setdefault(key, {name: Histogram(buckets) for name, _, buckets in METRICS})
+        return histograms
+
+    def observe(self, route, method, **values):
+        histograms = self.histograms(route, method)
+        for name, value in values.items():
+            if value is not None:
+                histograms[name].observe(value)
+
+    def clear(self):
+        with self.lock:
+            self.series.clear()
+
+    def render(self):
+        """The registry in the Prometheus text exposition format."""
+        lines = []
+        series = sorted(self.series.items())
+        for name, help_text, buckets in METRICS:
+            metric = f'littlelemon_{name}'
+            lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} histogram']
+            for (route, method), histograms in series:
+                labels = f'route="{route}",method="{method}"'
+                cumulative, total = histograms[name].snapshot()
+                for bound, count in zip(buckets + ('+Inf',), cumulative):
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'{metric}_sum{{{labels}}} {total}')
+                lines.append(f'{metric}_count{{{labels}}} {cumulative[-1]}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+class QueryRecorder:
+    """`execute_wrapper` that counts and times SQL, keeping the first statements for slow-request logs."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            if len(self.statements) < SLOW_REQUEST_STATEMENTS:
+                self.statements.append((elapsed, sql))
+
+
+class MetricsMiddleware:
+    """Record query count, DB time, render time and latency per endpoint.
+
+    Enabled with the METRICS_ENABLED setting. Requests slower than
+    METRICS_SLOW_REQUEST_SECONDS are logged with the SQL they ran. The
+    histograms live in the process, so each worker exposes its own.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+        latency = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match is not None else 'unmatched'
+        registry.observe(
+            route, request.method,
+            request_duration_seconds=latency,
+            db_queries=recorder.count,
+            db_duration_seconds=recorder.duration,
+            render_duration_seconds=getattr(request, '_littlelemon_render_duration', None),
+        )
+        if latency >= settings.METRICS_SLOW_REQUEST_SECONDS:
+            statements = '\n'.join(f'  {elapsed * 1000:.1f} ms  {sql}' for elapsed, sql in recorder.statements)
+            logger.warning(
+                'Slow request %s %s: %.1f ms, %d queries in %.1f ms\n%s',
+                request.method, request.path, latency * 1000, recorder.count, recorder.duration * 1000, statements,
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses render right after this hook returns.
+        start = time.perf_counter()
+
+        def rendered(response):
+            request._littlelemon_render_duration = time.perf_counter() - start
+
+        response.add_post_render_callback(rendered)
+        return response
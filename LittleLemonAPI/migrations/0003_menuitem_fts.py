@@ -0,0 +1,86 @@
+# Generated by Django 5.1.5 on 2026-10-18 09:32
+
+from django.db import migrations
+from django.db.utils import OperationalError
+
+FTS_TABLE = "LittleLemonAPI_menuitem_fts"
+
+CREATE_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE "{FTS_TABLE}" USING fts5(
+        title, category_title, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    INSERT INTO "{FTS_TABLE}" (rowid, title, category_title)
+    SELECT m.id, m.title, c.title
+    FROM "LittleLemonAPI_menuitem" m
+    JOIN "LittleLemonAPI_category" c ON c.id = m.category_id
+    """,
+    f"""
+    CREATE TRIGGER "{FTS_TABLE}_ai" AFTER INSERT ON "LittleLemonAPI_menuitem" BEGIN
+        INSERT INTO "{FTS_TABLE}" (rowid, title, category_title)
+        SELECT new.id, new.title, c.title
+        FROM "LittleLemonAPI_category" c WHERE c.id = new.category_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER "{FTS_TABLE}_ad" AFTER DELETE ON "LittleLemonAPI_menuitem" BEGIN
+        DELETE FROM "{FTS_TABLE}" WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER "{FTS_TABLE}_au" AFTER UPDATE OF id, title, category_id ON "LittleLemonAPI_menuitem" BEGIN
+        DELETE FROM "{FTS_TABLE}" WHERE rowid = old.id;
+        INSERT INTO "{FTS_TABLE}" (rowid, title, category_title)
+        SELECT new.id, new.title, c.title
+        FROM "LittleLemonAPI_category" c WHERE c.id = new.category_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER "{FTS_TABLE}_category_au" AFTER UPDATE OF title ON "LittleLemonAPI_category" BEGIN
+        UPDATE "{FTS_TABLE}" SET category_title = new.title
+        WHERE rowid IN (
+            SELECT id FROM "LittleLemonAPI_menuitem" WHERE category_id = new.id
+        );
+    END
+    """,
+]
+
+DROP_SQL = [
+    f'DROP TRIGGER IF EXISTS "{FTS_TABLE}_category_au"',
+    f'DROP TRIGGER IF EXISTS "{FTS_TABLE}_au"',
+    f'DROP TRIGGER IF EXISTS "{FTS_TABLE}_ad"',
+    f'DROP TRIGGER IF EXISTS "{FTS_TABLE}_ai"',
+    f'DROP TABLE IF EXISTS "{FTS_TABLE}"',
+]
+
+
+def create_fts_index(apps, schema_editor):
+    # The index is SQLite-specific; without FTS5 search falls back to LIKE.
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    try:
+        schema_editor.execute(CREATE_SQL[0])
+    except OperationalError:
+        return
+    for sql in CREATE_SQL[1:]:
+        schema_editor.execute(sql)
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("LittleLemonAPI", "0002_order_date_id_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
@@ -0,0 +1,116 @@
+# Generated by Django 5.1.5 on 2026-10-18 09:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_reports(apps, schema_editor):
+    """Fill the new aggregate tables from the orders placed before them.
+
+    The views only apply changes on top of what is stored, so starting
+    from empty tables would leave existing orders out of every report.
+    """
+    Order = apps.get_model("LittleLemonAPI", "Order")
+    OrderItem = apps.get_model("LittleLemonAPI", "OrderItem")
+    DailyRevenue = apps.get_model("LittleLemonAPI", "DailyRevenue")
+    MenuItemSales = apps.get_model("LittleLemonAPI", "MenuItemSales")
+    DeliveryCrewStats = apps.get_model("LittleLemonAPI", "DeliveryCrewStats")
+    DailyRevenue.objects.bulk_create([
+        DailyRevenue(date=row["date"], orders=row["orders"], revenue=row["revenue"])
+        for row in Order.objects.values("date").annotate(orders=Count("id"), revenue=Sum("total")).order_by()
+    ])
+    MenuItemSales.objects.bulk_create([
+        MenuItemSales(menuitem_id=row["menuitem_id"], quantity=row["quantity"], revenue=row["revenue"])
+        for row in OrderItem.objects.values("menuitem_id").annotate(quantity=Sum("quantity"), revenue=Sum("price")).order_by()
+    ])
+    DeliveryCrewStats.objects.bulk_create([
+        DeliveryCrewStats(delivery_crew_id=row["delivery_crew_id"], assigned=row["assigned"], delivered=row["delivered"])
+        for row in Order.objects.exclude(delivery_crew=None).values("delivery_crew_id").annotate(
+            assigned=Count("id"), delivered=Count("id", filter=Q(status=True))
+        ).order_by()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("LittleLemonAPI", "0004_idempotencykey"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyRevenue",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(unique=True)),
+                ("orders", models.IntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="DeliveryCrewStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("assigned", models.IntegerField(default=0)),
+                ("delivered", models.IntegerField(default=0)),
+                (
+                    "delivery_crew",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="delivery_stats",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="MenuItemSales",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("quantity", models.IntegerField(db_index=True, default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                (
+                    "menuitem",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sales",
+                        to="LittleLemonAPI.menuitem",
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(backfill_reports, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 10:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("LittleLemonAPI", "0008_order_archive"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="idempotencykey",
+            name="created",
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
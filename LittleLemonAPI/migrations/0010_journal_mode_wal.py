@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+def set_journal_mode(mode):
+    def forwards(apps, schema_editor):
+        if schema_editor.connection.vendor == 'sqlite':
+            with schema_editor.connection.cursor() as cursor:
+                cursor.execute(f'PRAGMA journal_mode = {mode}')
+    return forwards
+
+
+class Migration(migrations.Migration):
+    # The journal mode is stored in the database file, so it is switched
+    # once here rather than on every connection. SQLite can not change it
+    # inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ("LittleLemonAPI", "0009_idempotencykey_created"),
+    ]
+
+    operations = [
+        migrations.RunPython(set_journal_mode("wal"), set_journal_mode("delete")),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.5 on 2026-10-18 10:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("LittleLemonAPI", "0010_journal_mode_wal"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="archivedorder",
+            index=models.Index(fields=["date", "id"], name="archivedorder_date_id_idx"),
+        ),
+    ]
@@ -22,11 +22,24 @@ class Cart(models.Model):
         unique_together = ("menuitem", "user")
 
 class Order(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
-    delivery_crew = models.ForeignKey(User, on_delete=models.SET_NULL, related_name="delivery_crew", null=True)
-    status = models.BooleanField(default=0, db_index=True)
+    # The single-column indexes are left to the composite ones below, which
+    # start with the same column.
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+    delivery_crew = models.ForeignKey(User, on_delete=models.SET_NULL, related_name="delivery_crew", null=True, db_index=False)
+    status = models.BooleanField(default=0)
     total = models.DecimalField(max_digits=6, decimal_places=2)
-    date = models.DateField(db_index=True)
+    date = models.DateField()
+
+    class Meta:
+        # Each role's listing is an equality on its leading columns followed
+        # by the (date, id) order the cursor pagination reads in; SQLite keys
+        # every index by id last.
+        indexes = [
+            models.Index(fields=["date", "id"], name="order_date_id_idx"),
+            models.Index(fields=["user", "date"], name="order_user_date_idx"),
+            models.Index(fields=["delivery_crew", "status", "date"], name="order_crew_status_date_idx"),
+            models.Index(fields=["status", "date"], name="order_status_date_idx"),
+        ]
 
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="order_items")
@@ -37,3 +50,66 @@ class OrderItem(models.Model):
 
     class Meta:
         unique_together = ("order", "menuitem")
+
+class ArchivedOrder(models.Model):
+    # Delivered orders moved out of Order by archive_orders, under their
+    # original ids; AutoField ids are never reused, so they stay unique.
+    id = models.IntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="archived_orders")
+    delivery_crew = models.ForeignKey(User, on_delete=models.SET_NULL, related_name="+", null=True)
+    status = models.BooleanField(default=True)
+    total = models.DecimalField(max_digits=6, decimal_places=2)
+    date = models.DateField()
+
+    class Meta:
+        # The export reads archived orders in the same (date, id) order.
+        indexes = [
+            models.Index(fields=["date", "id"], name="archivedorder_date_id_idx"),
+        ]
+
+class ArchivedOrderItem(models.Model):
+    id = models.IntegerField(primary_key=True)
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name="order_items")
+    menuitem = models.ForeignKey(MenuItem, on_delete=models.CASCADE, related_name="+")
+    quantity = models.IntegerField()
+    unit_price = models.DecimalField(max_digits=6, decimal_places=2)
+    price = models.DecimalField(max_digits=6, decimal_places=2)
+
+class IdempotencyKey(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    response = models.JSONField()
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        unique_together = ("user", "key")
+
+class DailyRevenue(models.Model):
+    date = models.DateField(unique=True)
+    orders = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+class MenuItemSales(models.Model):
+    menuitem = models.OneToOneField(MenuItem, on_delete=models.CASCADE, related_name="sales")
+    quantity = models.IntegerField(default=0, db_index=True)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+class DeliveryCrewStats(models.Model):
+    delivery_crew = models.OneToOneField(User, on_delete=models.CASCADE, related_name="delivery_stats")
+    assigned = models.IntegerField(default=0)
+    delivered = models.IntegerField(default=0)
+
+class OrderEvent(models.Model):
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+    KINDS = [(CREATED, "Created"), (UPDATED, "Updated"), (DELETED, "Deleted")]
+
+    # A plain integer rather than a foreign key: the log outlives deleted orders.
+    order_id = models.IntegerField()
+    kind = models.CharField(max_length=16, choices=KINDS)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    delivery_crew = models.ForeignKey(User, on_delete=models.SET_NULL, related_name="+", null=True)
+    previous_delivery_crew = models.ForeignKey(User, on_delete=models.SET_NULL, related_name="+", null=True)
+    status = models.BooleanField()
+    created = models.DateTimeField(auto_now_add=True)
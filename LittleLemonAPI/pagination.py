@@ -0,0 +1,125 @@
+from base64 import b64decode, b64encode
+from datetime import date
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from django.core.paginator import InvalidPage
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class OrderCursorPagination(BasePagination):
+    """Keyset pagination over `(date, id)`, newest orders first.
+
+    Each page is a range seek on the `(date, id)` index: no COUNT(*) and no
+    OFFSET, so the last page costs the same as the first one.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self):
+        self.page_size = api_settings.PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request)
+        return self.build_page(list(queryset[:self.page_size + 1]))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request)
+        return self.build_page([order async for order in queryset[:self.page_size + 1]])
+
+    def page_queryset(self, queryset, request):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.position, self.reverse = position, reverse = self.decode_cursor(request)
+
+        if reverse:
+            queryset = queryset.order_by('date', 'id')
+            if position is not None:
+                queryset = queryset.filter(Q(date__gt=position[0]) | Q(date=position[0], id__gt=position[1]))
+        else:
+            queryset = queryset.order_by('-date', '-id')
+            if position is not None:
+                queryset = queryset.filter(Q(date__lt=position[0]) | Q(date=position[0], id__lt=position[1]))
+        return queryset
+
+    def build_page(self, results):
+        position, reverse = self.position, self.reverse
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = position is not None if not reverse else has_more
+        self.first = results[0] if results else None
+        self.last = results[-1] if results else None
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not (self.has_next and self.last):
+            return None
+        return self.encode_cursor(self.last, reverse=False)
+
+    def get_previous_link(self):
+        if not (self.has_previous and self.first):
+            return None
+        return self.encode_cursor(self.first, reverse=True)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            direction, day, pk = b64decode(encoded.encode('ascii')).decode('ascii').split('|')
+            return (date.fromisoformat(day), int(pk)), direction == 'r'
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, order, reverse):
+        direction = 'r' if reverse else 'f'
+        token = b64encode(f'{direction}|{order.date.isoformat()}|{order.pk}'.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+
+class AsyncPageNumberPagination(PageNumberPagination):
+    """`PageNumberPagination` whose count and page are fetched with the async ORM."""
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+        self.page.object_list = [item async for item in self.page.object_list]
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return list(self.page)
@@ -0,0 +1,97 @@
+import time
+from django.core.cache import cache
+from rest_framework.permissions import BasePermission, SAFE_METHODS
+from .transactions import in_transaction
+
+MANAGER = 'Manager'
+DELIVERY_CREW = 'Delivery crew'
+
+ROLES_TIMEOUT = 300
+
+
+def user_version_key(user_id):
+    return f'littlelemon:user-version:{user_id}'
+
+
+def _roles_key(user_id, version):
+    return f'littlelemon:roles:{user_id}:{version}'
+
+
+def user_version(user_id):
+    """Return the shared cache version of everything cached about a user.
+
+    Cached roles and cached token authentications are only valid for the
+    version they were stored under; `invalidate_user` moves it forward.
+    """
+    return cache.get_or_set(user_version_key(user_id), time.time_ns, None)
+
+
+def load_roles(user, version=None):
+    """Return the names of the groups `user` belongs to.
+
+    Lookups go through a per-user versioned cache entry, so a warm lookup does
+    not touch the database. Saving the user or changing their groups calls
+    `invalidate_user` (see LittleLemonAPI.signals), which bumps the version and orphans whatever was cached before, including
+    entries a concurrent request is still populating from a stale read.
+    Roles read inside a transaction are not cached, since a rollback could
+    take back the membership they reflect.
+    """
+    if not user.is_authenticated:
+        return frozenset()
+    if version is None:
+        version = user_version(user.pk)
+    key = _roles_key(user.pk, version)
+    roles = cache.get(key)
+    if roles is None:
+        roles = frozenset(user.groups.values_list('name', flat=True))
+        if not in_transaction():
+            cache.set(key, roles, ROLES_TIMEOUT)
+    return roles
+
+
+def invalidate_user(user_id):
+    # A fresh value, not `incr`, for the reason given in catalog.bump_version.
+    cache.set(user_version_key(user_id), time.time_ns(), None)
+
+
+def get_roles(request):
+    """Return the current user's roles, resolved at most once per request."""
+    roles = getattr(request, '_littlelemon_roles', None)
+    if roles is None:
+        roles = load_roles(request.user)
+        request._littlelemon_roles = roles
+    return roles
+
+
+def is_manager(request):
+    return request.user.is_superuser or MANAGER in get_roles(request)
+
+
+def is_delivery_crew(request):
+    return DELIVERY_CREW in get_roles(request)
+
+
+class IsManager(BasePermission):
+    message = 'Unauthorized'
+
+    def has_permission(self, request, view):
+        return is_manager(request)
+
+
+class IsManagerOrReadOnly(IsManager):
+    def has_permission(self, request, view):
+        return request.method in SAFE_METHODS or is_manager(request)
+
+
+class IsDeliveryCrew(BasePermission):
+    message = 'Unauthorized'
+
+    def has_permission(self, request, view):
+        return is_delivery_crew(request)
+
+
+class IsCustomer(BasePermission):
+    message = 'Unauthorized'
+
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and not (is_manager(request) or is_delivery_crew(request))
@@ -0,0 +1,49 @@
+from functools import lru_cache
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+# Bounded because request-shaped serializers (see fieldsets) come and go.
+@lru_cache(maxsize=1024)
+def _plan(serializer_class):
+    """Derive the (select_related, prefetch_related) lookups a serializer reads.
+
+    Forward foreign keys rendered by a nested serializer become joins, reverse
+    and many-to-many relations become prefetches whose queryset is planned
+    recursively from the child serializer.
+    """
+    select, prefetch = [], []
+    _walk(serializer_class(), serializer_class.Meta.model, '', select, prefetch)
+    return tuple(select), tuple(prefetch)
+
+
+def _walk(serializer, model, prefix, select, prefetch):
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*' or '.' in field.source:
+            continue
+        many = isinstance(field, serializers.ListSerializer)
+        nested = field.child if many else field
+        if not isinstance(nested, serializers.ModelSerializer):
+            continue
+        model_field = model._meta.get_field(field.source)
+        path = prefix + field.source
+        if model_field.is_relation and not model_field.many_to_many and not model_field.one_to_many and not many:
+            select.append(path)
+            _walk(nested, model_field.related_model, path + '__', select, prefetch)
+        else:
+            prefetch.append((path, type(nested)))
+
+
+def optimize_queryset(queryset, serializer_class):
+    """Return `queryset` with the joins and prefetches `serializer_class` needs.
+
+    The number of queries needed to serialize the result is fixed by the depth
+    of the serializer tree, not by the number of rows.
+    """
+    select, prefetch = _plan(serializer_class)
+    if select:
+        queryset = queryset.select_related(*select)
+    for path, child_class in prefetch:
+        child_queryset = optimize_queryset(child_class.Meta.model.objects.all(), child_class)
+        queryset = queryset.prefetch_related(Prefetch(path, queryset=child_queryset))
+    return queryset
@@ -0,0 +1,84 @@
+import csv
+import io
+import json
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """`JSONRenderer` with the encoder set up once, and orjson when it is installed.
+
+    DRF builds a new encoder for every response. Here compact responses go
+    through one shared encoder that skips cycle checks, or orjson, which
+    writes UTF-8 bytes directly; both fall back to DRF's `default` for dates, Decimals and
+    lazy strings, so the output is the same. Indented responses (an
+    `indent` media type parameter, or the browsable API) keep DRF's path.
+    """
+    # Serializer output is a tree, so the encoder need not track the
+    # containers it is in to detect cycles.
+    encoder = JSONEncoder(
+        ensure_ascii=JSONRenderer.ensure_ascii, allow_nan=not JSONRenderer.strict, check_circular=False,
+        separators=(',', ':') if JSONRenderer.compact else (', ', ': '),
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if orjson is not None and self.compact and not self.ensure_ascii:
+            content = orjson.dumps(data, default=self.encoder.default, option=orjson.OPT_NON_STR_KEYS)
+        else:
+            content = self.encoder.encode(data).encode()
+        # Like DRF, keep the output a strict JavaScript subset.
+        if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+            content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return content
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Newline-delimited JSON. Exports stream their own lines; this renders errors."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return (json.dumps(data, separators=(',', ':')) + '\n').encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    """CSV. Exports stream their own rows; this renders errors as a one-row table."""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if isinstance(data, dict):
+            writer.writerow(data.keys())
+            writer.writerow(data.values())
+        else:
+            writer.writerow([data])
+        return buffer.getvalue().encode(self.charset)
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Server-Sent Events. Streams write their own events; this renders errors as an `error` event."""
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return f"event: error\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode(self.charset)
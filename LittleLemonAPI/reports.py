@@ -0,0 +1,134 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from .models import ArchivedOrder, ArchivedOrderItem, DailyRevenue, DeliveryCrewStats, MenuItemSales, Order, OrderItem
+
+# The aggregate tables below are maintained incrementally as orders change,
+# so reports never scan the order history. Every update is a fixed number of
+# statements: missing rows are inserted with ignore_conflicts, then all of
+# them are adjusted in one UPDATE with F() expressions.
+
+
+def _adjust_daily_revenue(date, orders, revenue):
+    DailyRevenue.objects.bulk_create([DailyRevenue(date=date)], ignore_conflicts=True)
+    DailyRevenue.objects.filter(date=date).update(orders=F('orders') + orders, revenue=F('revenue') + revenue)
+
+
+def _adjust(model, key, deltas):
+    """Add `deltas` ({key value: {field: delta}}) to the rows of `model`."""
+    if not deltas:
+        return
+    model.objects.bulk_create([model(**{key: value}) for value in deltas], ignore_conflicts=True)
+    fields = {name for changes in deltas.values() for name in changes}
+    updates = {}
+    for name in fields:
+        output_field = model._meta.get_field(name).clone()
+        updates[name] = F(name) + Case(
+            *[When(**{key: value}, then=Value(changes.get(name, 0), output_field=output_field)) for value, changes in deltas.items()],
+            default=Value(0, output_field=output_field),
+            output_field=output_field,
+        )
+    model.objects.filter(**{f'{key}__in': list(deltas)}).update(**updates)
+
+
+def _crew_contribution(deltas, delivery_crew_id, status, sign):
+    if delivery_crew_id is not None:
+        deltas[delivery_crew_id]['assigned'] += sign
+        deltas[delivery_crew_id]['delivered'] += sign * int(bool(status))
+
+
+def record_order(order, order_items, sign=1):
+    """Add a new order (or, with `sign=-1`, remove a deleted one) to the aggregates."""
+    _adjust_daily_revenue(order.date, sign, sign * order.total)
+
+    sales = defaultdict(lambda: {'quantity': 0, 'revenue': Decimal(0)})
+    for item in order_items:
+        sales[item.menuitem_id]['quantity'] += sign * item.quantity
+        sales[item.menuitem_id]['revenue'] += sign * item.price
+    _adjust(MenuItemSales, 'menuitem_id', sales)
+
+    crew = defaultdict(lambda: {'assigned': 0, 'delivered': 0})
+    _crew_contribution(crew, order.delivery_crew_id, order.status, sign)
+    _adjust(DeliveryCrewStats, 'delivery_crew_id', crew)
+
+
+def record_order_change(before, order):
+    """Move the crew counters from `before` ((delivery_crew_id, status)) to `order`'s state."""
+    crew = defaultdict(lambda: {'assigned': 0, 'delivered': 0})
+    _crew_contribution(crew, *before, -1)
+    _crew_contribution(crew, order.delivery_crew_id, order.status, 1)
+    _adjust(DeliveryCrewStats, 'delivery_crew_id', {
+        crew_id: changes for crew_id, changes in crew.items() if any(changes.values())
+    })
+
+
+def forget_orders_of(user):
+    """Take `user`'s live and archived orders out of the aggregates before deleting the user cascades them."""
+    revenue, sales, crew = compute_reports(user)
+    _adjust(DailyRevenue, 'date', {
+        date: {'orders': -orders, 'revenue': -total} for date, (orders, total) in revenue.items()
+    })
+    _adjust(MenuItemSales, 'menuitem_id', {
+        pk: {'quantity': -quantity, 'revenue': -total} for pk, (quantity, total) in sales.items()
+    })
+    _adjust(DeliveryCrewStats, 'delivery_crew_id', {
+        pk: {'assigned': -assigned, 'delivered': -delivered} for pk, (assigned, delivered) in crew.items()
+    })
+
+
+def _add(totals, key, values):
+    previous = totals.get(key)
+    totals[key] = values if previous is None else tuple(a + b for a, b in zip(previous, values))
+
+
+def compute_reports(user=None):
+    """Aggregate the order history, live and archived, from scratch, keyed like the report tables.
+
+    With `user`, only that customer's orders are aggregated.
+    """
+    revenue, sales, crew = {}, {}, {}
+    for orders, order_items in [(Order.objects, OrderItem.objects), (ArchivedOrder.objects, ArchivedOrderItem.objects)]:
+        if user is not None:
+            orders, order_items = orders.filter(user=user), order_items.filter(order__user=user)
+        for row in orders.values('date').annotate(orders=Count('id'), revenue=Sum('total')):
+            _add(revenue, row['date'], (row['orders'], row['revenue']))
+        for row in order_items.values('menuitem_id').annotate(quantity=Sum('quantity'), revenue=Sum('price')):
+            _add(sales, row['menuitem_id'], (row['quantity'], row['revenue']))
+        for row in orders.exclude(delivery_crew=None).values('delivery_crew_id').annotate(
+            assigned=Count('id'), delivered=Count('id', filter=Q(status=True))
+        ):
+            _add(crew, row['delivery_crew_id'], (row['assigned'], row['delivered']))
+    return revenue, sales, crew
+
+
+def stored_reports():
+    """Read the report tables back, skipping rows that have netted out to zero."""
+    revenue = {
+        row.date: (row.orders, row.revenue) for row in DailyRevenue.objects.all() if row.orders
+    }
+    sales = {
+        row.menuitem_id: (row.quantity, row.revenue) for row in MenuItemSales.objects.all() if row.quantity
+    }
+    crew = {
+        row.delivery_crew_id: (row.assigned, row.delivered) for row in DeliveryCrewStats.objects.all() if row.assigned
+    }
+    return revenue, sales, crew
+
+
+def rebuild_reports():
+    with transaction.atomic():
+        revenue, sales, crew = compute_reports()
+        DailyRevenue.objects.all().delete()
+        MenuItemSales.objects.all().delete()
+        DeliveryCrewStats.objects.all().delete()
+        DailyRevenue.objects.bulk_create([
+            DailyRevenue(date=date, orders=orders, revenue=total) for date, (orders, total) in revenue.items()
+        ])
+        MenuItemSales.objects.bulk_create([
+            MenuItemSales(menuitem_id=pk, quantity=quantity, revenue=total) for pk, (quantity, total) in sales.items()
+        ])
+        DeliveryCrewStats.objects.bulk_create([
+            DeliveryCrewStats(delivery_crew_id=pk, assigned=assigned, delivered=delivered)
+            for pk, (assigned, delivered) in crew.items()
+        ])
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA = 'replica'
+
+
+class ReadReplicaRouter:
+    """Send reads to the read-only `replica` alias when it is configured.
+
+    Reads inside a transaction on the default database stay on it, so a
+    request sees its own uncommitted writes, and every write goes to the
+    default database even for instances that were loaded from the replica.
+    """
+
+    def db_for_read(self, model, **hints):
+        if REPLICA not in settings.DATABASES or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases are the same database file.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
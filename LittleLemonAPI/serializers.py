@@ -1,6 +1,8 @@
 from rest_framework import serializers
+from decimal import Decimal
 from django.contrib.auth.models import User
-from .models import MenuItem, Category, Cart, Order, OrderItem
+from .batch import BATCH_MAX_REQUESTS, BATCH_METHODS
+from .models import MenuItem, Category, Cart, Order, OrderItem, ArchivedOrder, ArchivedOrderItem, DailyRevenue, MenuItemSales, DeliveryCrewStats, OrderEvent
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -15,6 +17,13 @@ class MenuItemSerializer(serializers.ModelSerializer):
         model = MenuItem
         fields = ['id', 'title', 'price', 'featured', 'category', 'category_id']
 
+class MenuItemImportSerializer(serializers.Serializer):
+    id = serializers.IntegerField(min_value=1, required=False)
+    title = serializers.CharField(max_length=255)
+    price = serializers.DecimalField(max_digits=6, decimal_places=2, min_value=Decimal('0'))
+    featured = serializers.BooleanField(default=False)
+    category_id = serializers.IntegerField()
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -30,6 +39,23 @@ class CartSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'menuitem', 'menuitem_id', 'quantity', 'unit_price', 'price']
         read_only_fields = ['unit_price', 'price']
 
+class CartItemInputSerializer(serializers.Serializer):
+    menuitem_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+class CartCategorySummarySerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    title = serializers.CharField()
+    items = serializers.IntegerField()
+    quantity = serializers.IntegerField()
+    subtotal = serializers.DecimalField(max_digits=None, decimal_places=2)
+
+class CartSummarySerializer(serializers.Serializer):
+    items = serializers.IntegerField()
+    quantity = serializers.IntegerField()
+    subtotal = serializers.DecimalField(max_digits=None, decimal_places=2)
+    categories = CartCategorySummarySerializer(many=True)
+
 class OrderItemSerializer(serializers.ModelSerializer):
     menuitem = MenuItemSerializer(read_only=True)
 
@@ -49,3 +75,52 @@ class OrderSerializer(serializers.ModelSerializer):
         model = Order
         fields = ['id', 'user', 'delivery_crew', 'delivery_crew_id', 'status', 'total', 'date', 'order_items']
         read_only_fields = ['total', 'date']
+
+class ArchivedOrderItemSerializer(OrderItemSerializer):
+    class Meta(OrderItemSerializer.Meta):
+        model = ArchivedOrderItem
+
+class ArchivedOrderSerializer(OrderSerializer):
+    order_items = ArchivedOrderItemSerializer(many=True, read_only=True)
+
+    class Meta(OrderSerializer.Meta):
+        model = ArchivedOrder
+
+
+class DailyRevenueSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DailyRevenue
+        fields = ['date', 'orders', 'revenue']
+
+class MenuItemSalesSerializer(serializers.ModelSerializer):
+    menuitem_id = serializers.IntegerField()
+    title = serializers.CharField(source='menuitem.title')
+
+    class Meta:
+        model = MenuItemSales
+        fields = ['menuitem_id', 'title', 'quantity', 'revenue']
+
+class DeliveryCrewStatsSerializer(serializers.ModelSerializer):
+    delivery_crew_id = serializers.IntegerField()
+    username = serializers.CharField(source='delivery_crew.username')
+
+    class Meta:
+        model = DeliveryCrewStats
+        fields = ['delivery_crew_id', 'username', 'assigned', 'delivered']
+
+class OrderEventSerializer(serializers.ModelSerializer):
+    delivery_crew_id = serializers.IntegerField()
+    previous_delivery_crew_id = serializers.IntegerField()
+
+    class Meta:
+        model = OrderEvent
+        fields = ['id', 'order_id', 'kind', 'status', 'delivery_crew_id', 'previous_delivery_crew_id', 'created']
+
+class BatchItemSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=BATCH_METHODS)
+    path = serializers.RegexField(r'^/api/', max_length=2000)
+    body = serializers.JSONField(required=False, allow_null=True)
+
+class BatchSerializer(serializers.Serializer):
+    requests = BatchItemSerializer(many=True, allow_empty=False, max_length=BATCH_MAX_REQUESTS)
+    atomic = serializers.BooleanField(default=False)
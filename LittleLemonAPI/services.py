@@ -0,0 +1,215 @@
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+from .catalog import bump_version
+from .events import record_order_event
+from .models import Cart, Category, MenuItem, Order, OrderItem, IdempotencyKey, OrderEvent
+from .fastserializers import fast_data
+from .queries import optimize_queryset
+from .reports import record_order
+from .serializers import CartSerializer, MenuItemImportSerializer, OrderSerializer
+
+
+class EmptyCart(Exception):
+    pass
+
+
+class InvalidImport(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def add_to_cart(user, entries):
+    """Upsert `{menuitem_id, quantity}` entries into `user`'s cart.
+
+    Prices come from a single `in_bulk` lookup and all rows are written with
+    one INSERT ... ON CONFLICT statement. Returns the upserted cart rows,
+    ready to serialize, and whether any of them is new. Raises
+    `MenuItem.DoesNotExist` if an entry names an unknown menu item.
+    """
+    quantities = {entry['menuitem_id']: entry['quantity'] for entry in entries}
+    menuitems = MenuItem.objects.in_bulk(quantities)
+    if len(menuitems) != len(quantities):
+        raise MenuItem.DoesNotExist
+
+    # The probe, the upsert and the re-read share one transaction, so of two
+    # concurrent adds of the same item only the first reports it as new.
+    with transaction.atomic():
+        existing = set(
+            Cart.objects.filter(user=user, menuitem_id__in=quantities).values_list('menuitem_id', flat=True)
+        )
+        Cart.objects.bulk_create(
+            [
+                Cart(
+                    user=user,
+                    menuitem=menuitem,
+                    quantity=quantities[pk],
+                    unit_price=menuitem.price,
+                    price=quantities[pk] * menuitem.price
+                )
+                for pk, menuitem in menuitems.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['menuitem', 'user'],
+            update_fields=['quantity', 'unit_price', 'price'],
+        )
+        cart_items = list(optimize_queryset(
+            Cart.objects.filter(user=user, menuitem_id__in=quantities).order_by('id'), CartSerializer
+        ))
+    return cart_items, len(existing) < len(quantities)
+
+
+def cart_summary(user):
+    """Item count, quantity and subtotal of `user`'s cart, in total and per category.
+
+    The cart is aggregated by category in one query; the totals add up the
+    handful of category rows rather than the cart lines.
+    """
+    categories = list(
+        Cart.objects.filter(user=user)
+        .values('menuitem__category_id', 'menuitem__category__title')
+        .annotate(items=Count('id'), quantity=Sum('quantity'), subtotal=Sum('price'))
+        .order_by('menuitem__category_id')
+    )
+    return {
+        'items': sum(row['items'] for row in categories),
+        'quantity': sum(row['quantity'] for row in categories),
+        'subtotal': sum(row['subtotal'] for row in categories),
+        'categories': [
+            {
+                'id': row['menuitem__category_id'],
+                'title': row['menuitem__category__title'],
+                'items': row['items'],
+                'quantity': row['quantity'],
+                'subtotal': row['subtotal'],
+            }
+            for row in categories
+        ],
+    }
+
+
+def checkout(user, idempotency_key=None):
+    """Turn `user`'s cart into an order and return `(data, replayed)`.
+
+    Everything runs in one transaction with the cart rows locked, so a crash
+    leaves no partial order and concurrent submits for the same cart are
+    serialized: the loser finds the cart empty. When `idempotency_key` is
+    given, the serialized order is stored under it and a retry with the same
+    key gets that response back instead of a second order.
+
+    The number of queries does not depend on the size of the cart.
+    """
+    with transaction.atomic():
+        if idempotency_key:
+            stored = (
+                IdempotencyKey.objects.filter(user=user, key=idempotency_key)
+                .values_list('response', flat=True)
+                .first()
+            )
+            if stored is not None:
+                return stored, True
+
+        cart_items = list(Cart.objects.select_for_update().filter(user=user))
+        if not cart_items:
+            raise EmptyCart
+
+        # The locked rows are totalled by the database, not over the loaded
+        # Decimals; restricting to their ids keeps rows added meanwhile out.
+        cart_ids = [item.pk for item in cart_items]
+        total = Cart.objects.filter(pk__in=cart_ids).aggregate(total=Sum('price'))['total']
+        order = Order.objects.create(user=user, total=total, date=timezone.now().date())
+        order_items = OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                menuitem_id=cart_item.menuitem_id,
+                quantity=cart_item.quantity,
+                unit_price=cart_item.unit_price,
+                price=cart_item.price
+            )
+            for cart_item in cart_items
+        ])
+        Cart.objects.filter(pk__in=cart_ids).delete()
+        record_order(order, order_items)
+        record_order_event(OrderEvent.CREATED, order)
+
+        order = optimize_queryset(Order.objects.filter(pk=order.pk), OrderSerializer).get()
+        data = fast_data(OrderSerializer, order)
+        if idempotency_key:
+            IdempotencyKey.objects.create(user=user, key=idempotency_key, response=data)
+    return data, False
+
+
+def purge_idempotency_keys(before, batch_size=1000):
+    """Delete the idempotency keys created before `before` and return how many went.
+
+    Keys are deleted oldest first, `batch_size` per transaction, so a
+    checkout waits for at most one batch for the write lock.
+    """
+    purged = 0
+    while True:
+        with transaction.atomic():
+            pks = list(
+                IdempotencyKey.objects.filter(created__lt=before).order_by('created')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if pks:
+                IdempotencyKey.objects.filter(pk__in=pks).delete()
+        purged += len(pks)
+        if len(pks) < batch_size:
+            return purged
+
+
+def import_menu(rows):
+    """Create or update menu items from `rows` and return `(created_ids, updated_ids)`.
+
+    Rows with an `id` replace that menu item, the others are new items. All
+    rows are validated before anything is written, categories and existing
+    items are each looked up with one query, and the writes are one
+    `bulk_create` and one `bulk_update` in a single transaction. The catalog
+    cache is invalidated once, after commit. Raises `InvalidImport` with
+    `[{'row': n, 'errors': {...}}]` (rows numbered from 1) if any row is
+    invalid, in which case nothing is written.
+    """
+    serializer = MenuItemImportSerializer(data=rows, many=True, allow_empty=False)
+    if not serializer.is_valid():
+        if not isinstance(serializer.errors, list):
+            raise InvalidImport([{'row': None, 'errors': serializer.errors}])
+        errors = [{'row': n, 'errors': row_errors} for n, row_errors in enumerate(serializer.errors, 1) if row_errors]
+        raise InvalidImport(errors)
+    rows = serializer.validated_data
+
+    categories = Category.objects.in_bulk({row['category_id'] for row in rows})
+    existing = MenuItem.objects.in_bulk({row['id'] for row in rows if 'id' in row})
+    errors, seen = [], set()
+    for n, row in enumerate(rows, 1):
+        row_errors = {}
+        if row['category_id'] not in categories:
+            row_errors['category_id'] = [f"Unknown category {row['category_id']}."]
+        if 'id' in row:
+            if row['id'] not in existing:
+                row_errors['id'] = [f"Unknown menu item {row['id']}."]
+            elif row['id'] in seen:
+                row_errors['id'] = [f"Menu item {row['id']} appears more than once."]
+            seen.add(row['id'])
+        if row_errors:
+            errors.append({'row': n, 'errors': row_errors})
+    if errors:
+        raise InvalidImport(errors)
+
+    new_items, updated_items = [], []
+    for row in rows:
+        fields = {'title': row['title'], 'price': row['price'], 'featured': row['featured'], 'category_id': row['category_id']}
+        if 'id' in row:
+            menu_item = existing[row['id']]
+            for name, value in fields.items():
+                setattr(menu_item, name, value)
+            updated_items.append(menu_item)
+        else:
+            new_items.append(MenuItem(**fields))
+
+    with transaction.atomic():
+        created = MenuItem.objects.bulk_create(new_items, batch_size=500)
+        MenuItem.objects.bulk_update(updated_items, ['title', 'price', 'featured', 'category'], batch_size=500)
+        transaction.on_commit(bump_version)
+    return [item.pk for item in created], [item.pk for item in updated_items]
@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from .authentication import invalidate_token
+from .permissions import invalidate_user
+from .reports import forget_orders_of
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, **kwargs):
+    # Any saved field can matter to a cached authentication: is_superuser
+    # grants the manager role, and views read the rest off request.user.
+    invalidate_user(instance.pk)
+    if not instance.is_active:
+        for key in Token.objects.filter(user=instance).values_list('key', flat=True):
+            invalidate_token(key)
+
+
+@receiver(pre_delete, sender=User)
+def user_deleting(sender, instance, **kwargs):
+    # Deleting a customer cascades to their orders without going through
+    # OrderView.delete, which keeps the reports in step.
+    forget_orders_of(instance)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # `reverse` is set when the change comes from the group's side, e.g.
+    # `group.user_set.add(user)`; `pk_set` then holds user ids.
+    if action == 'pre_clear' and reverse:
+        instance._littlelemon_cleared = set(instance.user_set.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if not reverse:
+            user_ids = {instance.pk}
+        elif action == 'post_clear':
+            user_ids = instance.__dict__.pop('_littlelemon_cleared', set())
+        else:
+            user_ids = pk_set
+        for user_id in user_ids:
+            invalidate_user(user_id)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = dict(settings.SQLITE_PRAGMAS)
+    if 'mode=ro' in str(connection.settings_dict['NAME']):
+        # The journal mode is stored in the database file; a read-only
+        # connection can only use what the writer set. Only bench_contention
+        # --baseline sets it per connection.
+        pragmas.pop('journal_mode', None)
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
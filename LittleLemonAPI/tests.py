@@ -1,3 +1,1417 @@
-from django.test import TestCase
+import asyncio
+import csv
+import gzip
+import json
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User, Group
+from django.core.cache import cache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APITestCase, APITransactionTestCase
+from rest_framework.authtoken.models import Token
+from . import async_views, benchmarks, catalog, events, fieldsets, filters, metrics, permissions, renderers, throttling, urls
+from .authentication import token_cache
+from .archive import archive_batch, archive_orders
+from .exports import export_orders
+from .fastserializers import fast_data
+from .models import ArchivedOrder, ArchivedOrderItem, Cart, Category, DailyRevenue, DeliveryCrewStats, IdempotencyKey, MenuItem, MenuItemSales, Order, OrderEvent, OrderItem
+from .queries import optimize_queryset
+from .routers import ReadReplicaRouter
+from .serializers import CartSerializer, CategorySerializer, MenuItemSalesSerializer, MenuItemSerializer, OrderSerializer
 
-# Create your tests here.
+
+class LittleLemonFixtures:
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        throttling.get_store().reset()
+        self.manager_group = Group.objects.create(name='Manager')
+        self.crew_group = Group.objects.create(name='Delivery crew')
+        self.manager = User.objects.create_user('manager', 'manager@manager.com')
+        self.manager.groups.add(self.manager_group)
+        self.crew = User.objects.create_user('delivery', 'delivery@delivery.com')
+        self.crew.groups.add(self.crew_group)
+        self.customer = User.objects.create_user('customer', 'customer@customer.com')
+        self.category = Category.objects.create(slug='mains', title='Mains')
+        self.menuitem = MenuItem.objects.create(title='Pasta', price=Decimal('9.50'), featured=False, category=self.category)
+
+    def fill_cart(self, user, count):
+        menuitems = [
+            MenuItem.objects.create(title=f'Cart dish {n}', price=Decimal('2.50'), featured=False, category=self.category)
+            for n in range(count)
+        ]
+        Cart.objects.bulk_create([
+            Cart(user=user, menuitem=menuitem, quantity=2, unit_price=menuitem.price, price=2 * menuitem.price)
+            for menuitem in menuitems
+        ])
+
+    def create_orders(self, count, user=None, items=2):
+        user = user or self.customer
+        menuitems = [
+            MenuItem.objects.create(title=f'Dish {n}', price=Decimal('5.00'), featured=False, category=self.category)
+            for n in range(items)
+        ]
+        for _ in range(count):
+            order = Order.objects.create(user=user, delivery_crew=self.crew, total=Decimal('10.00'), date=timezone.now().date())
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, menuitem=menuitem, quantity=1, unit_price=menuitem.price, price=menuitem.price)
+                for menuitem in menuitems
+            ])
+
+    def count_queries(self, method, path, user, **kwargs):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(path, **kwargs)
+        return response, len(context.captured_queries)
+
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, THROTTLE_DATABASE=':memory:')
+class LittleLemonTestCase(LittleLemonFixtures, APITestCase):
+    pass
+
+
+@override_settings(CACHES=LOCMEM_CACHES, THROTTLE_DATABASE=':memory:')
+class LittleLemonTransactionTestCase(LittleLemonFixtures, APITransactionTestCase):
+    pass
+
+
+class OrdersQueryCountTests(LittleLemonTestCase):
+    def test_order_listing_query_count_is_independent_of_volume(self):
+        self.create_orders(1)
+        self.count_queries('get', '/api/orders', self.manager)
+        response, few = self.count_queries('get', '/api/orders', self.manager)
+        self.assertEqual(response.status_code, 200)
+
+        self.create_orders(20, items=3)
+        response, many = self.count_queries('get', '/api/orders', self.manager)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertEqual(few, many)
+
+    def test_order_listing_filters_by_status(self):
+        self.create_orders(3)
+        delivered, *pending = Order.objects.order_by('id')
+        delivered.status = True
+        delivered.save()
+        for user in [self.manager, self.crew, self.customer]:
+            self.client.force_authenticate(user)
+            for value, expected in [('1', [delivered]), ('true', [delivered]), ('0', pending[::-1])]:
+                results = self.client.get('/api/orders', {'status': value}).json()['results']
+                self.assertEqual([order['id'] for order in results], [order.pk for order in expected])
+
+    def test_order_listing_includes_nested_items(self):
+        self.create_orders(1)
+        self.client.force_authenticate(self.customer)
+        response = self.client.get('/api/orders')
+        order = response.data['results'][0]
+        self.assertEqual(order['user']['username'], 'customer')
+        self.assertEqual(order['delivery_crew']['username'], 'delivery')
+        self.assertEqual(order['order_items'][0]['menuitem']['category']['title'], 'Mains')
+
+
+class OrdersPaginationTests(LittleLemonTestCase):
+    def collect(self, user, url='/api/orders'):
+        self.client.force_authenticate(user)
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(order['id'] for order in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_pages_cover_every_order_newest_first(self):
+        self.create_orders(25, items=1)
+        ids = self.collect(self.manager)
+        expected = list(Order.objects.order_by('-date', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_previous_link_returns_to_first_page(self):
+        self.create_orders(15, items=1)
+        self.client.force_authenticate(self.manager)
+        first = self.client.get('/api/orders').data
+        second = self.client.get(first['next']).data
+        self.assertIsNone(first['previous'])
+        self.assertIsNone(second['next'])
+        back = self.client.get(second['previous']).data
+        self.assertEqual(back['results'], first['results'])
+
+    def test_role_branches_are_paginated(self):
+        other = User.objects.create_user('other')
+        self.create_orders(12, items=1)
+        self.create_orders(3, user=other, items=1)
+        self.assertEqual(len(self.collect(self.customer)), 12)
+        self.assertEqual(len(self.collect(other)), 3)
+        self.assertEqual(len(self.collect(self.crew)), 15)
+
+    def test_pages_seek_without_count_or_offset(self):
+        self.create_orders(30, items=1)
+        self.client.force_authenticate(self.manager)
+        first = self.client.get('/api/orders').data
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(first['next'])
+        sql = ' '.join(query['sql'] for query in context.captured_queries).upper()
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+
+    def test_invalid_cursor_is_rejected(self):
+        self.client.force_authenticate(self.manager)
+        response = self.client.get('/api/orders', {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 404)
+
+
+class RoleResolutionTests(LittleLemonTestCase):
+    def group_queries(self, method, path, user, **kwargs):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(path, **kwargs)
+        return response, [query for query in context.captured_queries if 'auth_group' in query['sql']]
+
+    def test_warm_role_checks_do_not_query_groups(self):
+        self.create_orders(1)
+        self.group_queries('get', '/api/orders', self.crew)
+        response, queries = self.group_queries('get', '/api/orders', self.crew)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, [])
+
+    def test_order_patch_resolves_roles_once(self):
+        self.create_orders(1)
+        order = Order.objects.get()
+        response, queries = self.group_queries('patch', f'/api/orders/{order.pk}', self.manager, data={'status': True})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+
+    def test_membership_changes_invalidate_cached_roles(self):
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.client.get('/api/groups/manager/users').status_code, 403)
+
+        self.client.force_authenticate(self.manager)
+        response = self.client.post('/api/groups/manager/users', {'username': 'customer'})
+        self.assertEqual(response.status_code, 201)
+
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.client.get('/api/groups/manager/users').status_code, 200)
+
+        self.client.force_authenticate(self.manager)
+        self.client.delete(f'/api/groups/manager/users/{self.customer.pk}')
+
+        self.client.force_authenticate(self.customer)
+        response = self.client.get('/api/groups/manager/users')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data['detail'], 'Unauthorized')
+
+    def test_customers_cannot_edit_menu(self):
+        self.client.force_authenticate(self.customer)
+        response = self.client.delete(f'/api/menu-items/{self.menuitem.pk}')
+        self.assertEqual(response.status_code, 403)
+        self.assertTrue(MenuItem.objects.filter(pk=self.menuitem.pk).exists())
+
+
+class CatalogCacheTests(LittleLemonTestCase):
+    def test_warm_catalog_reads_skip_the_database(self):
+        self.client.force_authenticate(self.customer)
+        for path in ['/api/menu-items', f'/api/menu-items/{self.menuitem.pk}', '/api/categories']:
+            first = self.client.get(path)
+            with self.assertNumQueries(0):
+                second = self.client.get(path)
+            self.assertEqual(first.content, second.content)
+            self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_matching_etag_returns_not_modified(self):
+        self.client.force_authenticate(self.customer)
+        etag = self.client.get('/api/menu-items')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/menu-items', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_menu_writes_bump_the_catalog_version(self):
+        self.client.force_authenticate(self.manager)
+        before = self.client.get(f'/api/menu-items/{self.menuitem.pk}')
+        self.client.patch(f'/api/menu-items/{self.menuitem.pk}', {'title': 'Lasagne'})
+        after = self.client.get(f'/api/menu-items/{self.menuitem.pk}', HTTP_IF_NONE_MATCH=before['ETag'])
+        self.assertEqual(after.status_code, 200)
+        self.assertNotEqual(after['ETag'], before['ETag'])
+        self.assertEqual(after.json()['title'], 'Lasagne')
+
+    def test_query_parameters_are_cached_separately(self):
+        MenuItem.objects.create(title='Cake', price=Decimal('3.00'), featured=True, category=self.category)
+        self.client.force_authenticate(self.customer)
+        ascending = self.client.get('/api/menu-items', {'ordering': 'price'}).json()
+        descending = self.client.get('/api/menu-items', {'ordering': '-price'}).json()
+        self.assertEqual(ascending['results'], list(reversed(descending['results'])))
+
+    def test_invalidation_reaches_other_worker_processes(self):
+        with tempfile.TemporaryDirectory() as location:
+            shared = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location}}
+            with override_settings(CACHES=shared):
+                self.client.force_authenticate(self.customer)
+                path = f'/api/menu-items/{self.menuitem.pk}'
+                self.assertEqual(self.client.get(path).json()['title'], 'Pasta')
+
+                other_worker = FileBasedCache(location, {})
+                MenuItem.objects.filter(pk=self.menuitem.pk).update(title='Risotto')
+                with mock.patch.object(catalog, 'cache', other_worker):
+                    catalog.bump_version()
+
+                self.assertEqual(self.client.get(path).json()['title'], 'Risotto')
+
+
+class MenuBootstrapTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cake = MenuItem.objects.create(title='Cake', price=Decimal('3.00'), featured=True, category=self.category)
+
+    def test_bootstrap_returns_the_home_screen_in_one_response(self):
+        self.client.force_authenticate(self.customer)
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/menu/bootstrap')
+        data = response.json()
+        self.assertEqual(data['categories'], [{'id': self.category.pk, 'slug': 'mains', 'title': 'Mains'}])
+        self.assertEqual([item['title'] for item in data['featured']], ['Cake'])
+        self.assertEqual(data['featured'][0]['category']['title'], 'Mains')
+        self.assertEqual(data['menu'], {
+            str(self.menuitem.pk): ['Pasta', '9.50', self.category.pk],
+            str(self.cake.pk): ['Cake', '3.00', self.category.pk],
+        })
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/menu/bootstrap').content, response.content)
+
+    def test_menu_changes_regenerate_the_snapshot(self):
+        self.client.force_authenticate(self.manager)
+        before = self.client.get('/api/menu/bootstrap')
+        self.client.patch(f'/api/menu-items/{self.menuitem.pk}', {'featured': True})
+        after = self.client.get('/api/menu/bootstrap', HTTP_IF_NONE_MATCH=before['ETag'])
+        self.assertEqual(after.status_code, 200)
+        self.assertEqual([item['title'] for item in after.json()['featured']], ['Pasta', 'Cake'])
+
+    def test_menu_items_filter_on_featured(self):
+        self.client.force_authenticate(self.customer)
+        featured = self.client.get('/api/menu-items', {'featured': 1}).json()['results']
+        regular = self.client.get('/api/menu-items', {'featured': 'false'}).json()['results']
+        self.assertEqual([item['title'] for item in featured], ['Cake'])
+        self.assertEqual([item['title'] for item in regular], ['Pasta'])
+
+
+class MenuSearchTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        desserts = Category.objects.create(slug='desserts', title='Desserts')
+        MenuItem.objects.create(title='Lemon Tart', price=Decimal('4.00'), featured=True, category=desserts)
+        MenuItem.objects.create(title='Greek Salad', price=Decimal('7.00'), featured=False, category=self.category)
+        self.client.force_authenticate(self.customer)
+
+    def titles(self, **params):
+        response = self.client.get('/api/menu-items', params)
+        self.assertEqual(response.status_code, 200)
+        return [item['title'] for item in response.json()['results']]
+
+    def test_search_matches_title_prefixes(self):
+        self.assertEqual(self.titles(search='lem'), ['Lemon Tart'])
+        self.assertEqual(self.titles(search='greek sal'), ['Greek Salad'])
+
+    def test_search_matches_category_titles(self):
+        self.assertEqual(self.titles(search='dessert'), ['Lemon Tart'])
+
+    def test_search_index_follows_menu_writes(self):
+        self.menuitem.title = 'Carbonara'
+        self.menuitem.save()
+        self.assertEqual(self.titles(search='carbo'), ['Carbonara'])
+        self.assertEqual(self.titles(search='pasta'), [])
+        Category.objects.filter(pk=self.category.pk).update(title='Pastas')
+        self.assertEqual(self.titles(search='pastas'), ['Carbonara', 'Greek Salad'])
+
+    def test_search_falls_back_without_full_text_index(self):
+        with mock.patch.object(filters, 'fts_available', return_value=False):
+            self.assertEqual(self.titles(search='tart'), ['Lemon Tart'])
+
+    def test_category_filter_and_ordering(self):
+        self.assertEqual(self.titles(category='Mains', ordering='-price'), ['Pasta', 'Greek Salad'])
+
+    def test_ordering_is_limited_to_indexed_fields(self):
+        self.assertEqual(self.titles(ordering='title'), self.titles())
+
+
+class RendererTests(LittleLemonTestCase):
+    data = {
+        'title': 'Crème brûlée\u2028', 'price': Decimal('4.50'), 'date': date(2025, 1, 2),
+        'items': [{'id': 1, 'featured': True, 'crew': None}],
+    }
+
+    def test_fast_renderer_matches_drf(self):
+        fast = renderers.FastJSONRenderer()
+        self.assertEqual(fast.render(self.data), JSONRenderer().render(self.data))
+        self.assertEqual(
+            fast.render(self.data, 'application/json; indent=2'), JSONRenderer().render(self.data, 'application/json; indent=2')
+        )
+
+    def test_stdlib_encoder_is_used_without_orjson(self):
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(renderers.FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    def test_large_responses_are_gzipped_for_clients_that_accept_it(self):
+        self.create_orders(10)
+        self.client.force_authenticate(self.customer)
+        plain = self.client.get('/api/orders')
+        compressed = self.client.get('/api/orders', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertLess(len(compressed.content) * 4, len(plain.content))
+
+    def test_short_responses_are_not_gzipped(self):
+        self.client.force_authenticate(self.customer)
+        response = self.client.get('/api/categories', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertLess(len(response.content), settings.COMPRESS_MIN_LENGTH)
+        self.assertNotIn('Content-Encoding', response)
+
+    def test_gzipped_catalog_reads_still_revalidate(self):
+        for n in range(20):
+            MenuItem.objects.create(title=f'Dish {n}', price=Decimal('5.00'), featured=False, category=self.category)
+        self.client.force_authenticate(self.customer)
+        response = self.client.get('/api/menu-items', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response['ETag'].startswith('W/'))
+        response = self.client.get('/api/menu-items', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+
+class SparseFieldsetTests(LittleLemonTestCase):
+    def get_with_queries(self, path, user=None, **params):
+        self.client.force_authenticate(user or self.customer)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(path, params)
+        return response, [query['sql'] for query in context.captured_queries]
+
+    def test_unrequested_objects_collapse_to_ids_and_skip_their_joins(self):
+        self.create_orders(2)
+        response, queries = self.get_with_queries('/api/orders', fields='id,user,total,order_items.menuitem,order_items.quantity')
+        self.assertEqual(response.status_code, 200)
+        order = response.json()['results'][0]
+        self.assertEqual(set(order), {'id', 'user', 'total', 'order_items'})
+        self.assertEqual(order['user'], self.customer.pk)
+        self.assertEqual(set(order['order_items'][0]), {'menuitem', 'quantity'})
+        self.assertIsInstance(order['order_items'][0]['menuitem'], int)
+        self.assertFalse([sql for sql in queries if 'JOIN' in sql and 'LittleLemonAPI_' in sql])
+
+    def test_expanded_objects_keep_their_nested_shape(self):
+        self.fill_cart(self.customer, 2)
+        response, queries = self.get_with_queries('/api/cart/menu-items', expand='menuitem')
+        item = response.json()[0]
+        self.assertEqual(item['user'], self.customer.pk)
+        self.assertEqual(item['menuitem']['category'], self.category.pk)
+        self.assertEqual(item['menuitem']['title'], 'Cart dish 0')
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('auth_user', queries[0])
+
+    def test_selecting_nested_fields_expands_the_object(self):
+        response, _ = self.get_with_queries(f'/api/menu-items/{self.menuitem.pk}', fields='title,category.title')
+        self.assertEqual(response.json(), {'title': 'Pasta', 'category': {'title': 'Mains'}})
+
+    def test_menu_listing_without_category_skips_the_join(self):
+        response, queries = self.get_with_queries('/api/menu-items', fields='id,title,price')
+        self.assertEqual(response.json()['results'], [{'id': self.menuitem.pk, 'title': 'Pasta', 'price': '9.50'}])
+        self.assertFalse([sql for sql in queries if 'JOIN' in sql])
+
+    def test_unknown_names_are_rejected(self):
+        self.assertEqual(self.get_with_queries('/api/orders', fields='id,secret')[0].status_code, 400)
+        self.assertEqual(self.get_with_queries('/api/orders', expand='total')[0].status_code, 400)
+        self.assertEqual(self.get_with_queries('/api/menu-items', expand='category.nothing')[0].status_code, 400)
+
+    def test_shapes_serialize_like_drf(self):
+        self.create_orders(2)
+        for fields, expand in [(None, frozenset({'user'})), (frozenset({'id', 'order_items.menuitem.category'}), frozenset())]:
+            shape = fieldsets._shaped(OrderSerializer, fields, expand)
+            orders = optimize_queryset(Order.objects.order_by('id'), shape)
+            self.assertEqual(fast_data(shape, orders, many=True), shape(orders, many=True).data)
+
+
+class CheckoutTests(LittleLemonTestCase):
+    def test_checkout_moves_cart_into_order(self):
+        self.fill_cart(self.customer, 3)
+        self.client.force_authenticate(self.customer)
+        response = self.client.post('/api/orders')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['total'], '15.00')
+        self.assertEqual(len(response.data['order_items']), 3)
+        self.assertFalse(Cart.objects.filter(user=self.customer).exists())
+
+    def test_empty_cart_is_rejected(self):
+        self.client.force_authenticate(self.customer)
+        response = self.client.post('/api/orders')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+    def test_query_count_does_not_grow_with_cart_size(self):
+        self.fill_cart(self.customer, 1)
+        self.count_queries('get', '/api/orders', self.customer)
+        response, small = self.count_queries('post', '/api/orders', self.customer)
+        self.assertEqual(response.status_code, 201)
+        self.fill_cart(self.customer, 15)
+        response, large = self.count_queries('post', '/api/orders', self.customer)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(small, large)
+
+    def test_retry_with_idempotency_key_replays_the_order(self):
+        self.fill_cart(self.customer, 2)
+        self.client.force_authenticate(self.customer)
+        first = self.client.post('/api/orders', HTTP_IDEMPOTENCY_KEY='abc')
+        self.fill_cart(self.customer, 1)
+        retry = self.client.post('/api/orders', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertTrue(Cart.objects.filter(user=self.customer).exists())
+
+    def test_expired_idempotency_keys_are_purged(self):
+        self.client.force_authenticate(self.customer)
+        for key in ('old', 'new'):
+            self.fill_cart(self.customer, 1)
+            self.client.post('/api/orders', HTTP_IDEMPOTENCY_KEY=key)
+        IdempotencyKey.objects.filter(key='old').update(created=timezone.now() - timedelta(hours=25))
+        out = StringIO()
+        call_command('purge_idempotency_keys', batch_size=1, stdout=out)
+        self.assertIn('Purged 1 idempotency keys', out.getvalue())
+        self.assertEqual(list(IdempotencyKey.objects.values_list('key', flat=True)), ['new'])
+
+    def test_failed_checkout_leaves_no_partial_order(self):
+        self.fill_cart(self.customer, 2)
+        self.client.force_authenticate(self.customer)
+        with mock.patch.object(OrderItem.objects, 'bulk_create', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.client.post('/api/orders')
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(Cart.objects.filter(user=self.customer).count(), 2)
+
+
+class ConcurrentCheckoutTests(LittleLemonTransactionTestCase):
+    threads = 8
+
+    def submit_in_parallel(self, path='/api/orders', data=None, method='post', user=None, **headers):
+        barrier = threading.Barrier(self.threads)
+        responses = []
+
+        def submit():
+            client = APIClient()
+            client.force_authenticate(user or self.customer)
+            barrier.wait()
+            try:
+                responses.append(getattr(client, method)(path, data, **headers))
+            except Exception as exc:
+                responses.append(exc)
+            finally:
+                connections.close_all()
+
+        workers = [threading.Thread(target=submit) for _ in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return responses
+
+    def test_parallel_submits_create_a_single_order(self):
+        self.fill_cart(self.customer, 5)
+        responses = self.submit_in_parallel()
+        self.assertEqual(sorted(response.status_code for response in responses), [201] + [400] * (self.threads - 1))
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(OrderItem.objects.count(), 5)
+
+    def test_parallel_retries_with_one_key_share_the_order(self):
+        self.fill_cart(self.customer, 5)
+        responses = self.submit_in_parallel(HTTP_IDEMPOTENCY_KEY='retry-1')
+        self.assertEqual({response.status_code for response in responses}, {201})
+        self.assertEqual(len({response.json()['id'] for response in responses}), 1)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+    def test_parallel_adds_of_one_item_create_it_once(self):
+        responses = self.submit_in_parallel('/api/cart/menu-items', {'menuitem_id': self.menuitem.pk, 'quantity': 2})
+        self.assertEqual(sorted(response.status_code for response in responses), [200] * (self.threads - 1) + [201])
+        self.assertEqual(Cart.objects.filter(user=self.customer).count(), 1)
+
+    def test_parallel_deliveries_of_one_order_count_once(self):
+        self.fill_cart(self.customer, 1)
+        self.client.force_authenticate(self.customer)
+        order_id = self.client.post('/api/orders').data['id']
+        self.client.force_authenticate(self.manager)
+        self.client.patch(f'/api/orders/{order_id}', {'delivery_crew_id': self.crew.pk})
+        Order.objects.filter(pk=order_id).update(status=False)
+        call_command('rebuild_reports', stdout=StringIO())
+        responses = self.submit_in_parallel(f'/api/orders/{order_id}', {'status': True}, method='patch', user=self.crew)
+        self.assertEqual({response.status_code for response in responses}, {200})
+        self.assertEqual(DeliveryCrewStats.objects.get(delivery_crew=self.crew).delivered, 1)
+        self.assertEqual(OrderEvent.objects.filter(kind=OrderEvent.UPDATED).count(), 2)
+
+
+class CartTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cake = MenuItem.objects.create(title='Cake', price=Decimal('3.00'), featured=False, category=self.category)
+        self.client.force_authenticate(self.customer)
+
+    def test_single_item_keeps_created_and_updated_statuses(self):
+        response = self.client.post('/api/cart/menu-items', {'menuitem_id': self.menuitem.pk, 'quantity': 2})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['price'], '19.00')
+        response = self.client.post('/api/cart/menu-items', {'menuitem_id': self.menuitem.pk, 'quantity': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['quantity'], 3)
+        self.assertEqual(Cart.objects.get().price, Decimal('28.50'))
+
+    def test_bulk_upsert_writes_in_a_fixed_number_of_queries(self):
+        Cart.objects.create(user=self.customer, menuitem=self.cake, quantity=1, unit_price=Decimal('3.00'), price=Decimal('3.00'))
+        extra = [
+            MenuItem.objects.create(title=f'Side {n}', price=Decimal('1.00'), featured=False, category=self.category)
+            for n in range(10)
+        ]
+        entries = [{'menuitem_id': self.cake.pk, 'quantity': 4}, {'menuitem_id': self.menuitem.pk}]
+        entries += [{'menuitem_id': menuitem.pk, 'quantity': 2} for menuitem in extra]
+        # Four statements, plus the savepoint pair the test's own transaction
+        # turns add_to_cart's atomic() into.
+        with self.assertNumQueries(6):
+            response = self.client.post('/api/cart/menu-items', entries, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data), 12)
+        self.assertEqual(Cart.objects.get(menuitem=self.cake).price, Decimal('12.00'))
+        self.assertEqual(Cart.objects.filter(user=self.customer).count(), 12)
+
+    def test_unknown_menu_item_writes_nothing(self):
+        entries = [{'menuitem_id': self.cake.pk}, {'menuitem_id': 9999}]
+        response = self.client.post('/api/cart/menu-items', entries, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Cart.objects.exists())
+
+    def test_invalid_entries_are_reported(self):
+        response = self.client.post('/api/cart/menu-items', [{'menuitem_id': self.cake.pk, 'quantity': 0}], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('quantity', response.data[0])
+        response = self.client.post('/api/cart/menu-items', [], format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_cart_listing_query_count_is_fixed(self):
+        self.fill_cart(self.customer, 1)
+        with self.assertNumQueries(1):
+            self.client.get('/api/cart/menu-items')
+        self.fill_cart(self.customer, 10)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/cart/menu-items')
+        self.assertEqual(response.data[0]['menuitem']['category']['title'], 'Mains')
+
+    def test_summary_totals_the_cart_per_category_in_one_query(self):
+        drinks = Category.objects.create(slug='drinks', title='Drinks')
+        lemonade = MenuItem.objects.create(title='Lemonade', price=Decimal('2.25'), featured=False, category=drinks)
+        entries = [{'menuitem_id': self.menuitem.pk, 'quantity': 2}, {'menuitem_id': self.cake.pk}, {'menuitem_id': lemonade.pk, 'quantity': 4}]
+        self.client.post('/api/cart/menu-items', entries, format='json')
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/cart/summary')
+        self.assertEqual(response.json(), {
+            'items': 3, 'quantity': 7, 'subtotal': '31.00',
+            'categories': [
+                {'id': self.category.pk, 'title': 'Mains', 'items': 2, 'quantity': 3, 'subtotal': '22.00'},
+                {'id': drinks.pk, 'title': 'Drinks', 'items': 1, 'quantity': 4, 'subtotal': '9.00'},
+            ],
+        })
+
+    def test_summary_of_empty_cart(self):
+        response = self.client.get('/api/cart/summary')
+        self.assertEqual(response.json(), {'items': 0, 'quantity': 0, 'subtotal': '0.00', 'categories': []})
+
+
+class BatchTests(LittleLemonTestCase):
+    def batch(self, requests, user=None, **options):
+        self.client.force_authenticate(user or self.customer)
+        return self.client.post('/api/batch', {'requests': requests, **options}, format='json')
+
+    def test_sub_requests_run_in_order_as_the_batch_user(self):
+        response = self.batch([
+            {'method': 'POST', 'path': '/api/cart/menu-items', 'body': {'menuitem_id': self.menuitem.pk, 'quantity': 2}},
+            {'method': 'GET', 'path': '/api/cart/summary'},
+            {'method': 'GET', 'path': f'/api/menu-items/{self.menuitem.pk}?fields=title'},
+            {'method': 'GET', 'path': '/api/reports/revenue'},
+            {'method': 'GET', 'path': '/api/nowhere'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        responses = response.json()['responses']
+        self.assertEqual([item['status'] for item in responses], [201, 200, 200, 403, 404])
+        self.assertEqual(responses[0]['body']['price'], '19.00')
+        self.assertEqual(responses[1]['body']['subtotal'], '19.00')
+        self.assertEqual(responses[2]['body'], {'title': 'Pasta'})
+
+    def test_atomic_batch_rolls_back_on_the_first_failure(self):
+        response = self.batch([
+            {'method': 'POST', 'path': '/api/cart/menu-items', 'body': {'menuitem_id': self.menuitem.pk}},
+            {'method': 'POST', 'path': '/api/orders'},
+            {'method': 'DELETE', 'path': '/api/orders/1'},
+            {'method': 'GET', 'path': '/api/orders'},
+        ], atomic=True)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([item['status'] for item in response.json()['responses']], [201, 201, 403])
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(Cart.objects.exists())
+
+    def test_responses_without_a_body(self):
+        response = self.batch([
+            {'method': 'POST', 'path': '/api/cart/menu-items', 'body': {'menuitem_id': self.menuitem.pk}},
+            {'method': 'DELETE', 'path': '/api/cart/menu-items'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(item['status'], item['body']) for item in response.json()['responses'][1:]], [(204, None)])
+        self.assertFalse(Cart.objects.exists())
+
+    def test_rolled_back_batch_leaves_no_stale_catalog(self):
+        path = f'/api/menu-items/{self.menuitem.pk}'
+        response = self.batch([
+            {'method': 'PATCH', 'path': path, 'body': {'price': '99.00'}},
+            {'method': 'GET', 'path': path},
+            {'method': 'DELETE', 'path': '/api/orders/999999'},
+        ], user=self.manager, atomic=True)
+        self.assertEqual([item['status'] for item in response.json()['responses']], [200, 200, 404])
+        self.assertEqual(response.json()['responses'][1]['body']['price'], '99.00')
+        self.assertEqual(self.client.get(path).json()['price'], '9.50')
+
+    def test_rolled_back_batch_leaves_no_stale_roles(self):
+        self.create_orders(1)
+        promoted = User.objects.create_user('promoted')
+        response = self.batch([
+            {'method': 'POST', 'path': '/api/groups/delivery-crew/users', 'body': {'username': 'promoted'}},
+            {'method': 'PUT', 'path': f'/api/orders/{Order.objects.get().pk}', 'body': {'delivery_crew_id': promoted.pk}},
+            {'method': 'DELETE', 'path': '/api/orders/999999'},
+        ], user=self.manager, atomic=True)
+        self.assertEqual([item['status'] for item in response.json()['responses']], [201, 200, 404])
+        self.assertEqual(permissions.load_roles(promoted), frozenset())
+
+    def test_atomic_batch_commits_when_every_request_succeeds(self):
+        response = self.batch([
+            {'method': 'POST', 'path': '/api/cart/menu-items', 'body': {'menuitem_id': self.menuitem.pk}},
+            {'method': 'POST', 'path': '/api/orders'},
+        ], atomic=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Order.objects.get().total, Decimal('9.50'))
+
+    def test_authentication_and_roles_are_resolved_once(self):
+        requests = [{'method': 'GET', 'path': '/api/orders'}] * 3
+        self.client.force_authenticate(self.customer)
+        with mock.patch.object(permissions, 'load_roles', wraps=permissions.load_roles) as load_roles:
+            response = self.client.post('/api/batch', {'requests': requests}, format='json')
+        self.assertEqual([item['status'] for item in response.json()['responses']], [200] * 3)
+        self.assertEqual(load_roles.call_count, 1)
+
+    def test_invalid_batches_are_rejected(self):
+        self.assertEqual(self.batch([]).status_code, 400)
+        self.assertEqual(self.batch([{'method': 'TRACE', 'path': '/api/orders'}]).status_code, 400)
+        self.assertEqual(self.batch([{'method': 'GET', 'path': '/admin/'}]).status_code, 400)
+        self.assertEqual(self.batch([{'method': 'GET', 'path': '/api/orders'}] * 21).status_code, 400)
+        nested = self.batch([{'method': 'POST', 'path': '/api/batch', 'body': {'requests': []}}])
+        self.assertEqual(nested.json()['responses'][0]['status'], 400)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.post('/api/batch', {'requests': []}, format='json').status_code, 401)
+
+    def test_streaming_responses_are_refused(self):
+        response = self.batch([{'method': 'GET', 'path': '/api/orders/export'}], user=self.manager)
+        self.assertEqual(response.json()['responses'][0]['status'], 400)
+
+
+class OrderArchiveTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.old = timezone.now().date() - timedelta(days=400)
+        self.client.force_authenticate(self.customer)
+        self.fill_cart(self.customer, 2)
+        self.client.post('/api/orders')
+        self.fill_cart(self.customer, 1)
+        self.client.post('/api/orders')
+        self.delivered, self.pending = Order.objects.order_by('id')
+        Order.objects.filter(pk=self.delivered.pk).update(date=self.old, status=True, delivery_crew=self.crew)
+        Order.objects.filter(pk=self.pending.pk).update(date=self.old)
+        # `update()` skips the report upkeep the API does.
+        call_command('rebuild_reports', stdout=StringIO())
+
+    def test_old_delivered_orders_move_to_the_archive(self):
+        before = self.client.get(f'/api/orders/{self.delivered.pk}').json()
+        self.assertEqual(archive_orders(timezone.now().date() - timedelta(days=365)), 1)
+        self.assertEqual(list(Order.objects.values_list('pk', flat=True)), [self.pending.pk])
+        self.assertEqual(ArchivedOrderItem.objects.filter(order_id=self.delivered.pk).count(), 2)
+        self.assertFalse(OrderItem.objects.filter(order_id=self.delivered.pk).exists())
+        self.assertEqual(self.client.get(f'/api/orders/{self.delivered.pk}').json(), before)
+
+    def test_archived_orders_keep_their_visibility_and_are_read_only(self):
+        archive_orders(timezone.now().date())
+        path = f'/api/orders/{self.delivered.pk}'
+        self.client.force_authenticate(self.crew)
+        self.assertEqual(self.client.get(path, {'fields': 'id,user'}).json(), {'id': self.delivered.pk, 'user': self.customer.pk})
+        self.client.force_authenticate(User.objects.create_user('other'))
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'detail': 'No Order matches the given query.'})
+        self.client.force_authenticate(self.manager)
+        self.assertEqual(self.client.get(path).status_code, 200)
+        self.assertEqual(self.client.delete(path).status_code, 404)
+        self.assertTrue(ArchivedOrder.objects.filter(pk=self.delivered.pk).exists())
+
+    def test_export_still_includes_archived_orders(self):
+        self.fill_cart(self.customer, 1)
+        self.client.post('/api/orders')
+        before = list(export_orders())
+        archive_orders(timezone.now().date())
+        self.assertEqual(list(export_orders()), before)
+        self.assertEqual([order['id'] for order in before], [self.delivered.pk, self.pending.pk, Order.objects.latest('id').pk])
+        self.assertEqual(len(list(export_orders(start=self.old, end=self.old, chunk_size=1))), 2)
+
+    def test_archiving_runs_in_batches_and_resumes(self):
+        Order.objects.filter(pk=self.pending.pk).update(status=True)
+        cutoff = timezone.now().date()
+        self.assertEqual(archive_batch(cutoff, batch_size=1), 1)
+        self.assertEqual(list(ArchivedOrder.objects.values_list('pk', flat=True)), [self.delivered.pk])
+        self.assertEqual(archive_orders(cutoff, batch_size=1), 1)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(archive_orders(cutoff), 0)
+
+    def test_reports_still_count_archived_orders(self):
+        self.client.force_authenticate(self.manager)
+        revenue = self.client.get('/api/reports/revenue').json()
+        out = StringIO()
+        call_command('archive_orders', days=365, stdout=out)
+        self.assertIn('Archived 1 delivered orders', out.getvalue())
+        call_command('rebuild_reports', verify=True, stdout=StringIO())
+        call_command('rebuild_reports', stdout=StringIO())
+        self.assertEqual(self.client.get('/api/reports/revenue').json(), revenue)
+        self.assertEqual(self.client.get('/api/reports/delivery-crew').json()[0]['delivered'], 1)
+
+
+class ThrottlingTests(LittleLemonTestCase):
+    def rates(self, **rates):
+        config = dict(settings.REST_FRAMEWORK)
+        config['DEFAULT_THROTTLE_RATES'] = {**config['DEFAULT_THROTTLE_RATES'], **rates}
+        return override_settings(REST_FRAMEWORK=config)
+
+    def test_bucket_refills_over_time(self):
+        store = throttling.get_store()
+        self.assertEqual(store.consume('key', 2, 60, 1000.0), (True, 1.0))
+        self.assertEqual(store.consume('key', 2, 60, 1000.0), (True, 0.0))
+        self.assertEqual(store.consume('key', 2, 60, 1001.0)[0], False)
+        self.assertEqual(store.consume('key', 2, 60, 1030.0)[0], True)
+
+    def test_workers_share_one_bucket(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = f'{directory}/throttle.sqlite3'
+            first, second = throttling.TokenBucketStore(path), throttling.TokenBucketStore(path)
+            allowed = [store.consume('user_1', 3, 60, 1000.0)[0] for store in (first, second, first, second)]
+            self.assertEqual(allowed, [True, True, True, False])
+
+    def test_checkout_scope_only_limits_posts(self):
+        with self.rates(checkout='1/minute'):
+            self.client.force_authenticate(self.customer)
+            self.assertEqual(self.client.post('/api/orders').status_code, 400)
+            response = self.client.post('/api/orders')
+            self.assertEqual(response.status_code, 429)
+            self.assertIn('Retry-After', response)
+            self.assertEqual(self.client.get('/api/orders').status_code, 200)
+
+    def test_user_rate_applies_across_scopes(self):
+        with self.rates(user='2/day'):
+            self.client.force_authenticate(self.customer)
+            self.assertEqual(self.client.get('/api/categories').status_code, 200)
+            self.assertEqual(self.client.get('/api/orders').status_code, 200)
+            self.assertEqual(self.client.get('/api/categories').status_code, 429)
+
+
+class CachedTokenAuthenticationTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.token = Token.objects.create(user=self.customer)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_warm_token_costs_no_queries(self):
+        self.client.get('/api/categories')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/categories')
+        self.assertEqual(response.status_code, 200)
+
+    def test_warm_token_carries_resolved_roles(self):
+        self.client.get('/api/cart/menu-items')
+        with CaptureQueriesContext(connection) as context:
+            self.client.get('/api/cart/menu-items')
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertIn('LittleLemonAPI_cart', context.captured_queries[0]['sql'])
+
+    def test_logout_evicts_token(self):
+        self.client.get('/api/cart/menu-items')
+        self.assertEqual(self.client.post('/auth/token/logout/').status_code, 204)
+        self.assertEqual(self.client.get('/api/cart/menu-items').status_code, 401)
+
+    def test_deactivation_evicts_token(self):
+        self.client.get('/api/cart/menu-items')
+        self.customer.is_active = False
+        self.customer.save()
+        self.assertEqual(self.client.get('/api/cart/menu-items').status_code, 401)
+
+    def test_group_changes_refresh_cached_roles(self):
+        self.assertEqual(self.client.get('/api/groups/manager/users').status_code, 403)
+        self.manager_group.user_set.add(self.customer)
+        self.assertEqual(self.client.get('/api/groups/manager/users').status_code, 200)
+        self.customer.groups.clear()
+        self.assertEqual(self.client.get('/api/groups/manager/users').status_code, 403)
+        self.customer.groups.add(self.manager_group)
+        self.manager_group.user_set.clear()
+        self.assertEqual(self.client.get('/api/groups/manager/users').status_code, 403)
+
+    def test_saving_the_user_refreshes_the_cached_user(self):
+        self.customer.is_superuser = True
+        self.customer.save()
+        self.assertEqual(self.client.get('/api/groups/manager/users').status_code, 200)
+        self.customer.is_superuser = False
+        self.customer.save()
+        self.assertEqual(self.client.get('/api/groups/manager/users').status_code, 403)
+
+    def test_requests_get_their_own_copy_of_the_cached_user(self):
+        first = self.client.get('/api/categories').wsgi_request.user
+        second = self.client.get('/api/categories').wsgi_request.user
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+
+
+class ReportBackfillTests(LittleLemonTransactionTestCase):
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([('LittleLemonAPI', target)])
+        return executor.loader.project_state(('LittleLemonAPI', target)).apps
+
+    def test_orders_placed_before_the_report_tables_are_counted(self):
+        apps = self.migrate('0004_idempotencykey')
+        order = apps.get_model('LittleLemonAPI', 'Order').objects.create(
+            user_id=self.customer.pk, delivery_crew_id=self.crew.pk, status=True, total=Decimal('19.00'), date=timezone.now().date(),
+        )
+        apps.get_model('LittleLemonAPI', 'OrderItem').objects.create(
+            order_id=order.pk, menuitem_id=self.menuitem.pk, quantity=2, unit_price=Decimal('9.50'), price=Decimal('19.00'),
+        )
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes('LittleLemonAPI')[0][1])
+        call_command('rebuild_reports', verify=True, stdout=StringIO())
+        self.assertEqual(DeliveryCrewStats.objects.get(delivery_crew=self.crew).delivered, 1)
+
+
+class ReportTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_crew = User.objects.create_user('driver')
+        self.other_crew.groups.add(self.crew_group)
+
+    def checkout(self, items):
+        self.fill_cart(self.customer, items)
+        self.client.force_authenticate(self.customer)
+        return self.client.post('/api/orders').data['id']
+
+    def test_deleting_a_customer_removes_their_orders_from_the_reports(self):
+        other = User.objects.create_user('other')
+        self.fill_cart(other, 1)
+        self.client.force_authenticate(other)
+        self.client.post('/api/orders')
+        self.checkout(2)
+        self.checkout(1)
+        Order.objects.update(delivery_crew=self.crew, status=True, date=timezone.now().date() - timedelta(days=400))
+        call_command('rebuild_reports', stdout=StringIO())
+        # One of the customer's orders is archived, the other stays live.
+        archive_batch(timezone.now().date(), batch_size=2)
+        self.customer.delete()
+        call_command('rebuild_reports', verify=True, stdout=StringIO())
+        self.assertEqual(DeliveryCrewStats.objects.get(delivery_crew=self.crew).delivered, 1)
+
+    def test_reports_follow_order_lifecycle(self):
+        first, second = self.checkout(2), self.checkout(1)
+        self.client.force_authenticate(self.manager)
+        self.client.patch(f'/api/orders/{first}', {'delivery_crew_id': self.crew.pk})
+        self.client.patch(f'/api/orders/{second}', {'delivery_crew_id': self.crew.pk})
+        self.client.patch(f'/api/orders/{second}', {'delivery_crew_id': self.other_crew.pk})
+        self.client.force_authenticate(self.crew)
+        self.assertEqual(self.client.patch(f'/api/orders/{first}', {'status': True}).status_code, 200)
+
+        self.client.force_authenticate(self.manager)
+        revenue = self.client.get('/api/reports/revenue').json()
+        self.assertEqual(revenue, [{'date': timezone.now().date().isoformat(), 'orders': 2, 'revenue': '15.00'}])
+        crew = self.client.get('/api/reports/delivery-crew').json()
+        self.assertEqual([(row['username'], row['assigned'], row['delivered']) for row in crew], [('delivery', 1, 1), ('driver', 1, 0)])
+        top = self.client.get('/api/reports/top-menu-items', {'limit': 1}).json()
+        self.assertEqual(len(top), 1)
+        self.assertEqual(top[0]['quantity'], 2)
+
+        self.client.delete(f'/api/orders/{second}')
+        call_command('rebuild_reports', '--verify', stdout=StringIO())
+
+    def test_verify_detects_drift_and_rebuild_repairs_it(self):
+        self.checkout(2)
+        DailyRevenue.objects.update(orders=5)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_reports', '--verify', stdout=StringIO())
+        call_command('rebuild_reports', stdout=StringIO())
+        call_command('rebuild_reports', '--verify', stdout=StringIO())
+
+    def test_reports_are_manager_only(self):
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.client.get('/api/reports/revenue').status_code, 403)
+
+
+@override_settings(ROOT_URLCONF='LittleLemonAPI.async_views')
+class AsyncReadViewTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tokens = {user.pk: Token.objects.create(user=user).key for user in [self.manager, self.customer]}
+
+    def sync_get(self, user, path, **params):
+        cache.clear()
+        self.client.force_authenticate(user)
+        with override_settings(ROOT_URLCONF='LittleLemonAPI.urls'):
+            return self.client.get(path, params)
+
+    async def async_get(self, user, path, **params):
+        await cache.aclear()
+        return await self.async_client.get(path, params, headers={'Authorization': f'Token {self.tokens[user.pk]}'})
+
+    def test_read_handlers_are_coroutines(self):
+        for view in async_views.urlpatterns:
+            self.assertTrue(asyncio.iscoroutinefunction(view.callback))
+        self.assertTrue(async_views.AsyncOrdersView.view_is_async)
+
+    def test_async_reads_match_the_sync_views(self):
+        self.create_orders(3)
+        paths = [('/api/menu-items', {}), ('/api/menu-items', {'search': 'pas', 'ordering': '-price'}),
+                 (f'/api/menu-items/{self.menuitem.pk}', {}), ('/api/categories', {}), ('/api/menu/bootstrap', {}),
+                 ('/api/orders', {})]
+        for path, params in paths:
+            expected = self.sync_get(self.customer, path, **params)
+            response = async_to_sync(self.async_get)(self.customer, path, **params)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), expected.json())
+
+    def test_order_cursor_pages_are_awaited(self):
+        self.create_orders(12, items=1)
+        page = async_to_sync(self.async_get)(self.customer, '/api/orders').json()
+        self.assertEqual(len(page['results']), settings.REST_FRAMEWORK['PAGE_SIZE'])
+        cursor = parse_qs(urlsplit(page['next']).query)['cursor'][0]
+        rest = async_to_sync(self.async_get)(self.customer, '/api/orders', cursor=cursor).json()
+        self.assertEqual(len(page['results']) + len(rest['results']), 12)
+
+    async def test_errors_and_writes_keep_their_behaviour(self):
+        self.assertEqual((await self.async_get(self.customer, '/api/menu-items/999')).status_code, 404)
+        self.assertEqual((await self.async_client.get('/api/orders')).status_code, 401)
+        response = await self.async_client.post(
+            '/api/categories', {'slug': 'drinks', 'title': 'Drinks'}, content_type='application/json',
+            headers={'Authorization': f'Token {self.tokens[self.manager.pk]}'},
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual((await self.async_get(self.customer, '/api/menu-items', page=9)).status_code, 404)
+
+
+class FastSerializerTests(LittleLemonTestCase):
+    def render(self, data):
+        return JSONRenderer().render(data)
+
+    def assertSameOutput(self, serializer_class, instance, many=False):
+        expected = self.render(serializer_class(instance, many=many).data)
+        self.assertEqual(self.render(fast_data(serializer_class, instance, many=many)), expected)
+
+    def test_golden_output_for_listing_shapes(self):
+        self.create_orders(3, items=2)
+        MenuItem.objects.create(title='Crème brûlée', price=Decimal('0.05'), featured=True, category=self.category)
+        MenuItem.objects.create(title='Feast', price=Decimal('1234.50'), featured=False, category=self.category)
+        Order.objects.filter(pk=Order.objects.first().pk).update(delivery_crew=None, status=True)
+        self.fill_cart(self.customer, 2)
+
+        self.assertSameOutput(OrderSerializer, optimize_queryset(Order.objects.order_by('id'), OrderSerializer), many=True)
+        self.assertSameOutput(CartSerializer, optimize_queryset(Cart.objects.order_by('id'), CartSerializer), many=True)
+        self.assertSameOutput(MenuItemSerializer, optimize_queryset(MenuItem.objects.order_by('id'), MenuItemSerializer), many=True)
+        self.assertSameOutput(CategorySerializer, Category.objects.all(), many=True)
+        self.assertSameOutput(OrderSerializer, optimize_queryset(Order.objects.all(), OrderSerializer).first())
+
+    def test_values_that_need_drf_conversion_are_handled_by_drf(self):
+        menuitem = MenuItem(pk=7, title='Soup', price=Decimal('9.5'), featured=1, category=None)
+        self.assertSameOutput(MenuItemSerializer, menuitem)
+        self.assertEqual(fast_data(MenuItemSerializer, menuitem)['price'], '9.50')
+        for price in ['1E+2', '3.14159', '-0.5']:
+            self.assertSameOutput(MenuItemSerializer, MenuItem(pk=8, title='Dish', price=Decimal(price), featured=False, category=self.category))
+
+    def test_serializers_with_dotted_sources_fall_back_to_field_access(self):
+        self.fill_cart(self.customer, 1)
+        self.client.force_authenticate(self.customer)
+        self.client.post('/api/orders')
+        self.assertSameOutput(MenuItemSalesSerializer, MenuItemSales.objects.select_related('menuitem'), many=True)
+
+    def test_bench_command_reports_a_speedup(self):
+        out = StringIO()
+        call_command('bench_serializers', '--orders', '50', '--repeat', '1', stdout=out)
+        self.assertIn('speedup', out.getvalue())
+        with mock.patch('LittleLemonAPI.management.commands.bench_serializers.fast_data', return_value=[]):
+            with self.assertRaises(CommandError):
+                call_command('bench_serializers', '--orders', '5', '--repeat', '1', stdout=StringIO())
+
+
+class OrderExportTests(LittleLemonTestCase):
+    def export(self, user=None, **params):
+        self.client.force_authenticate(user or self.manager)
+        return self.client.get('/api/orders/export', params)
+
+    def content(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson_streams_one_order_per_line(self):
+        self.create_orders(3)
+        response = self.export()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        orders = [json.loads(line) for line in self.content(response).splitlines()]
+        self.assertEqual([order['id'] for order in orders], sorted(Order.objects.values_list('id', flat=True)))
+        self.assertEqual(len(orders[0]['order_items']), 2)
+        self.assertEqual(orders[0], fast_data(OrderSerializer, optimize_queryset(Order.objects.all(), OrderSerializer).get(pk=orders[0]['id'])))
+
+    def test_csv_has_a_row_per_order_item(self):
+        self.create_orders(2)
+        rows = list(csv.reader(self.content(self.export(format='csv')).splitlines()))
+        self.assertEqual(rows[0][:3], ['order_id', 'date', 'user_id'])
+        self.assertEqual(len(rows), 1 + 2 * 2)
+        self.assertEqual(rows[1][8], str(OrderItem.objects.order_by('id').first().menuitem_id))
+
+    def test_date_range_is_inclusive(self):
+        self.create_orders(3)
+        today = timezone.now().date()
+        Order.objects.filter(pk=Order.objects.order_by('id').first().pk).update(date=today - timedelta(days=2))
+        lines = self.content(self.export(start=(today - timedelta(days=1)).isoformat(), end=today.isoformat())).splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(self.export(start='yesterday').status_code, 400)
+
+    def test_queries_grow_with_chunks_not_orders(self):
+        self.create_orders(5)
+        with CaptureQueriesContext(connection) as context:
+            lines = list(export_orders(chunk_size=2))
+        self.assertEqual(len(lines), 5)
+        # One empty read of the archive, then the live orders and the items
+        # of each of their 3 chunks.
+        self.assertEqual(len(context.captured_queries), 1 + 1 + 3)
+
+    def test_export_is_manager_only(self):
+        self.assertEqual(self.export(self.customer).status_code, 403)
+
+    def test_command_writes_the_same_export(self):
+        self.create_orders(2)
+        out = StringIO()
+        call_command('export_orders', '--format', 'csv', stdout=out)
+        self.assertEqual(out.getvalue(), self.content(self.export(format='csv')))
+
+
+class DatabaseProfileTests(LittleLemonTestCase):
+    def test_connections_use_the_production_pragmas(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout'])
+
+    def test_reads_stay_on_default_without_a_replica(self):
+        self.assertEqual(MenuItem.objects.all().db, 'default')
+
+    def test_replica_serves_reads_outside_transactions_only(self):
+        router = ReadReplicaRouter()
+        with mock.patch.dict(settings.DATABASES, {'replica': {}}):
+            with mock.patch.object(connections['default'], 'in_atomic_block', False):
+                self.assertEqual(router.db_for_read(MenuItem), 'replica')
+            with mock.patch.object(connections['default'], 'in_atomic_block', True):
+                self.assertEqual(router.db_for_read(MenuItem), 'default')
+            self.assertEqual(router.db_for_write(MenuItem, instance=MenuItem()), 'default')
+            self.assertFalse(router.allow_migrate('replica', 'LittleLemonAPI'))
+
+
+class MenuImportTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.desserts = Category.objects.create(slug='desserts', title='Desserts')
+        self.client.force_authenticate(self.manager)
+
+    def test_json_rows_are_created_and_updated_in_fixed_queries(self):
+        rows = [{'title': f'Cake {n}', 'price': '4.00', 'category_id': self.desserts.pk} for n in range(50)]
+        rows.append({'id': self.menuitem.pk, 'title': 'Penne', 'price': '11.00', 'featured': True, 'category_id': self.category.pk})
+        with self.captureOnCommitCallbacks(execute=True), mock.patch('LittleLemonAPI.services.bump_version') as bump:
+            response, queries = self.count_queries('post', '/api/menu-items/bulk', self.manager, data=rows, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['created']), 50)
+        self.assertEqual(response.data['updated'], [self.menuitem.pk])
+        self.assertEqual(bump.call_count, 1)
+        self.assertLessEqual(queries, 7)
+        self.menuitem.refresh_from_db()
+        self.assertEqual((self.menuitem.title, self.menuitem.price, self.menuitem.featured), ('Penne', Decimal('11.00'), True))
+
+    def test_csv_upload(self):
+        content = f'id,title,price,featured,category_id\n,Tiramisu,6.50,,{self.desserts.pk}\n{self.menuitem.pk},Pasta,9.75,false,{self.category.pk}\n'
+        response = self.client.post('/api/menu-items/bulk', content, content_type='text/csv')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(MenuItem.objects.filter(title='Tiramisu', featured=False).exists())
+        self.assertEqual(MenuItem.objects.get(pk=self.menuitem.pk).price, Decimal('9.75'))
+
+    def test_invalid_rows_are_reported_and_nothing_is_written(self):
+        rows = [
+            {'title': 'Good', 'price': '1.00', 'category_id': self.category.pk},
+            {'title': 'Bad price', 'price': 'free', 'category_id': self.category.pk},
+            {'title': 'No category', 'price': '1.00', 'category_id': 999},
+            {'id': 999, 'title': 'Ghost', 'price': '1.00', 'category_id': self.category.pk},
+        ]
+        response = self.client.post('/api/menu-items/bulk', rows, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['row'] for error in response.data['errors']], [2])
+        rows[1]['price'] = '2.00'
+        response = self.client.post('/api/menu-items/bulk', rows, format='json')
+        self.assertEqual([(error['row'], list(error['errors'])) for error in response.data['errors']], [(3, ['category_id']), (4, ['id'])])
+        self.assertFalse(MenuItem.objects.filter(title='Good').exists())
+
+    def test_bulk_import_is_manager_only(self):
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.client.post('/api/menu-items/bulk', [], format='json').status_code, 403)
+
+    def test_command_imports_a_file(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as source:
+            json.dump([{'title': 'Soup', 'price': '3.00', 'category_id': self.category.pk}], source)
+            source.flush()
+            call_command('import_menu', source.name, stdout=StringIO())
+        self.assertTrue(MenuItem.objects.filter(title='Soup').exists())
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as source:
+            source.write('title,price,category_id\nSoup,abc,1\n')
+            source.flush()
+            with self.assertRaisesMessage(CommandError, 'row 1'):
+                call_command('import_menu', source.name, stdout=StringIO())
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_SLOW_REQUEST_SECONDS=60)
+class MetricsTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        metrics.registry.clear()
+
+    def scrape(self):
+        self.client.force_authenticate(self.manager)
+        response = self.client.get('/api/_metrics')
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_requests_are_recorded_per_route_and_method(self):
+        self.client.force_authenticate(self.customer)
+        self.client.get('/api/cart/menu-items')
+        self.client.get('/api/cart/menu-items')
+        self.client.get(f'/api/orders/{self.menuitem.pk}')
+        text = self.scrape()
+        self.assertIn('littlelemon_request_duration_seconds_count{route="api/cart/menu-items",method="GET"} 2', text)
+        self.assertIn('littlelemon_db_queries_count{route="api/orders/<int:orderId>",method="GET"} 1', text)
+        self.assertIn('littlelemon_render_duration_seconds_count{route="api/cart/menu-items",method="GET"} 2', text)
+        self.assertIn('# TYPE littlelemon_db_queries histogram', text)
+
+    def test_query_histogram_counts_statements(self):
+        self.create_orders(3)
+        _, queries = self.count_queries('get', '/api/orders', self.customer)
+        text = self.scrape()
+        bucket = min(bound for bound in metrics.QUERY_BUCKETS if bound >= queries)
+        self.assertIn(f'littlelemon_db_queries_bucket{{route="api/orders",method="GET",le="{bucket}"}} 1', text)
+        self.assertIn(f'littlelemon_db_queries_sum{{route="api/orders",method="GET"}} {queries}', text)
+
+    def test_slow_requests_log_their_sql(self):
+        self.client.force_authenticate(self.customer)
+        with override_settings(METRICS_SLOW_REQUEST_SECONDS=0), self.assertLogs('LittleLemonAPI.metrics', 'WARNING') as logs:
+            self.client.get('/api/cart/menu-items')
+        self.assertIn('Slow request GET /api/cart/menu-items', logs.output[0])
+        self.assertIn('LittleLemonAPI_cart', logs.output[0])
+
+    def test_metrics_are_manager_only(self):
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.client.get('/api/_metrics').status_code, 403)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled_by_default(self):
+        self.client.force_authenticate(self.customer)
+        self.client.get('/api/cart/menu-items')
+        self.assertEqual(metrics.registry.series, {})
+
+
+class BenchmarkTests(LittleLemonTestCase):
+    def test_every_route_has_a_case(self):
+        routes = {str(pattern.pattern) for pattern in urls.urlpatterns}
+        self.assertEqual({case.route for case in benchmarks.cases()}, routes)
+
+    def test_routes_stay_within_query_budgets(self):
+        fixture = benchmarks.seed(menu_items=60, orders=40, users=40, spares=3)
+        results, failures = benchmarks.run(fixture, iterations=2)
+        self.assertEqual(failures, [])
+        self.assertEqual(len(results), len(benchmarks.cases()))
+        self.assertEqual(set(results['GET api/orders [crew]']), {'queries', 'budget', 'p50_ms', 'p99_ms', 'peak_kib'})
+
+    def test_hot_queries_use_indexes(self):
+        fixture = benchmarks.seed(menu_items=60, orders=40, users=40)
+        scans = {sql: benchmarks.full_scans(sql) for sql in benchmarks.hot_statements(fixture)}
+        self.assertEqual({sql: tables for sql, tables in scans.items() if tables}, {})
+
+    def test_full_scans_are_reported_for_unindexed_filters(self):
+        self.assertEqual(benchmarks.full_scans('SELECT id FROM "LittleLemonAPI_order" WHERE total > 5'), ['LittleLemonAPI_order'])
+        self.assertEqual(benchmarks.full_scans('SELECT id FROM "LittleLemonAPI_order" WHERE user_id = 1 ORDER BY date'), [])
+        self.assertEqual(benchmarks.full_scans('SELECT id FROM "LittleLemonAPI_order" ORDER BY id LIMIT 10'), [])
+
+    def test_compare_flags_regressions(self):
+        baseline = {'GET api/orders [manager]': {'queries': 2, 'p50_ms': 10.0, 'p99_ms': 20.0, 'peak_kib': 100.0}}
+        same = {'GET api/orders [manager]': {'queries': 2, 'p50_ms': 11.0, 'p99_ms': 60.0, 'peak_kib': 120.0}}
+        self.assertEqual(benchmarks.compare(same, baseline, 0.25), [])
+        worse = {'GET api/orders [manager]': {'queries': 3, 'p50_ms': 14.0, 'p99_ms': 60.0, 'peak_kib': 100.0}, 'GET api/new [manager]': same['GET api/orders [manager]']}
+        self.assertEqual(benchmarks.compare(worse, baseline, 0.25), [
+            'GET api/orders [manager]: 2 -> 3 queries',
+            'GET api/orders [manager]: p50_ms 10.0 -> 14.0',
+        ])
+        self.assertEqual(benchmarks.compare(same, baseline, 0.25, tail_threshold=1.0), ['GET api/orders [manager]: p99_ms 20.0 -> 60.0'])
+
+
+class OrderEventTests(LittleLemonTestCase):
+    def feed(self, user, **params):
+        self.client.force_authenticate(user)
+        response = self.client.get('/api/orders/events', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def place_order(self):
+        self.fill_cart(self.customer, 1)
+        self.client.force_authenticate(self.customer)
+        return self.client.post('/api/orders').json()['id']
+
+    def test_order_lifecycle_is_logged(self):
+        order_id = self.place_order()
+        self.client.force_authenticate(self.manager)
+        self.client.patch(f'/api/orders/{order_id}', {'delivery_crew_id': self.crew.pk}, format='json')
+        self.client.force_authenticate(self.crew)
+        self.client.patch(f'/api/orders/{order_id}', {'status': True}, format='json')
+        self.client.patch(f'/api/orders/{order_id}', {'status': True}, format='json')
+        self.client.force_authenticate(self.manager)
+        self.client.delete(f'/api/orders/{order_id}')
+
+        feed = self.feed(self.manager)
+        self.assertEqual(
+            [(event['order_id'], event['kind'], event['status'], event['delivery_crew_id'], event['previous_delivery_crew_id']) for event in feed['events']],
+            [(order_id, 'created', False, None, None), (order_id, 'updated', False, self.crew.pk, None),
+             (order_id, 'updated', True, self.crew.pk, self.crew.pk), (order_id, 'deleted', True, self.crew.pk, None)],
+        )
+        self.assertEqual(feed['last_id'], feed['events'][-1]['id'])
+
+    def test_feed_is_filtered_by_role(self):
+        order_id = self.place_order()
+        other_crew = User.objects.create_user('other-crew')
+        other_crew.groups.add(self.crew_group)
+        self.client.force_authenticate(self.manager)
+        self.client.put(f'/api/orders/{order_id}', {'delivery_crew_id': self.crew.pk}, format='json')
+        self.client.put(f'/api/orders/{order_id}', {'delivery_crew_id': other_crew.pk}, format='json')
+
+        self.assertEqual(len(self.feed(self.manager)['events']), 3)
+        self.assertEqual(len(self.feed(self.customer)['events']), 3)
+        # The first crew member sees the assignment and being taken off the order.
+        self.assertEqual([event['delivery_crew_id'] for event in self.feed(self.crew)['events']], [self.crew.pk, other_crew.pk])
+        self.assertEqual(len(self.feed(other_crew)['events']), 1)
+        self.assertEqual(self.feed(User.objects.create_user('stranger')), {'events': [], 'last_id': 0})
+
+    def test_since_returns_only_newer_events(self):
+        self.place_order()
+        first = self.feed(self.customer)
+        self.place_order()
+        newer = self.feed(self.customer, since=first['last_id'])
+        self.assertEqual(len(newer['events']), 1)
+        self.assertGreater(newer['last_id'], first['last_id'])
+        self.assertEqual(self.feed(self.customer, since=newer['last_id']), {'events': [], 'last_id': newer['last_id']})
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.client.get('/api/orders/events', {'since': 'x'}).status_code, 400)
+
+    def test_sync_feed_never_waits(self):
+        self.place_order()
+        since = self.feed(self.customer)['last_id']
+        self.client.force_authenticate(self.customer)
+        started = time.monotonic()
+        response = self.client.get('/api/orders/events', {'since': since, 'wait': 10})
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(response.json(), {'events': [], 'last_id': since})
+
+
+@override_settings(ROOT_URLCONF='LittleLemonAPI.async_views')
+class OrderEventWakeupTests(LittleLemonTransactionTestCase):
+    async def test_long_poll_returns_when_an_event_is_committed(self):
+        order = await Order.objects.acreate(user=self.customer, total=Decimal('5.00'), date=timezone.now().date())
+        token = await Token.objects.acreate(user=self.customer)
+        await sync_to_async(events.latest_event_id)()
+
+        def commit_event():
+            time.sleep(0.2)
+            with transaction.atomic():
+                events.record_order_event(OrderEvent.UPDATED, order)
+            connections.close_all()
+
+        writer = threading.Thread(target=commit_event)
+        writer.start()
+        started = time.monotonic()
+        response = await self.async_client.get('/api/orders/events', {'wait': 10}, headers={'Authorization': f'Token {token.key}'})
+        writer.join()
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual([event['kind'] for event in response.json()['events']], ['updated'])
+
+
+@override_settings(ROOT_URLCONF='LittleLemonAPI.async_views')
+class AsyncOrderEventTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.token = Token.objects.create(user=self.customer).key
+        self.order = Order.objects.create(user=self.customer, total=Decimal('5.00'), date=timezone.now().date())
+        self.event = events.record_order_event(OrderEvent.CREATED, self.order)
+
+    async def test_long_poll(self):
+        headers = {'Authorization': f'Token {self.token}'}
+        response = await self.async_client.get('/api/orders/events', headers=headers)
+        self.assertEqual(response.json()['last_id'], self.event.pk)
+        with mock.patch.object(events, 'POLL_INTERVAL', 0.01):
+            response = await self.async_client.get('/api/orders/events', {'since': self.event.pk, 'wait': 0.05}, headers=headers)
+        self.assertEqual(response.json(), {'events': [], 'last_id': self.event.pk})
+
+    def test_idle_long_poll_reads_the_cache_not_the_log(self):
+        get = async_to_sync(self.async_client.get)
+        headers = {'Authorization': f'Token {self.token}'}
+        with self.captureOnCommitCallbacks(execute=True):
+            events.record_order_event(OrderEvent.CREATED, Order.objects.create(user=self.crew, total=1, date=timezone.now().date()))
+        get('/api/orders/events', {'since': self.event.pk}, headers=headers)
+        with mock.patch.object(events, 'POLL_INTERVAL', 0.01), CaptureQueriesContext(connection) as context:
+            response = get('/api/orders/events', {'since': self.event.pk, 'wait': 0.1}, headers=headers)
+        self.assertEqual(response.json()['events'], [])
+        # One page read up front, then only cache reads while waiting.
+        self.assertEqual(len(context.captured_queries), 1)
+
+    async def test_stream_sends_events_as_sse(self):
+        response = await self.async_client.get(
+            '/api/orders/events/stream', headers={'Authorization': f'Token {self.token}', 'Accept': 'text/event-stream'},
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 3000\n\n')
+        message = (await anext(stream)).decode()
+        self.assertTrue(message.startswith(f'id: {self.event.pk}\nevent: order\ndata: '))
+        self.assertEqual(json.loads(message.split('data: ')[1])['order_id'], self.order.pk)
+        await stream.aclose()
+
+    async def test_stream_requires_authentication(self):
+        response = await self.async_client.get('/api/orders/events/stream', headers={'Accept': 'text/event-stream'})
+        self.assertEqual(response.status_code, 401)
+        self.assertTrue(response.content.startswith(b'event: error\ndata: '))
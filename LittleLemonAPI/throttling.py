@@ -0,0 +1,145 @@
+import sqlite3
+import threading
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import AnonRateThrottle, SimpleRateThrottle, UserRateThrottle
+
+CONSUME_SQL = """
+INSERT INTO bucket (key, tokens, updated, expires, allowed)
+VALUES (:key, :capacity - 1, :now, :now + :duration, 1)
+ON CONFLICT (key) DO UPDATE SET
+    tokens = MIN(:capacity, tokens + MAX(0, :now - updated) * :rate)
+        - (MIN(:capacity, tokens + MAX(0, :now - updated) * :rate) >= 1),
+    allowed = MIN(:capacity, tokens + MAX(0, :now - updated) * :rate) >= 1,
+    updated = :now,
+    expires = :now + :duration
+RETURNING allowed, tokens
+"""
+
+
+class TokenBucketStore:
+    """Token buckets kept in an SQLite file shared by every worker on a host.
+
+    Each check is a single UPSERT that refills the bucket for the time elapsed
+    since the last request and takes a token if one is available, so it is
+    atomic across processes and costs the same no matter how many requests a
+    client has made.
+    """
+    prune_every = 10000
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.local = threading.local()
+
+    @property
+    def connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS bucket ('
+                'key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, '
+                'expires REAL NOT NULL, allowed INTEGER NOT NULL) WITHOUT ROWID'
+            )
+            self.local.connection = connection
+            self.local.calls = 0
+        return connection
+
+    def consume(self, key, capacity, duration, now):
+        """Take a token from `key`'s bucket; return `(allowed, tokens_left)`."""
+        connection = self.connection
+        allowed, tokens = connection.execute(CONSUME_SQL, {
+            'key': key,
+            'capacity': capacity,
+            'duration': duration,
+            'rate': capacity / duration,
+            'now': now,
+        }).fetchone()
+        self.local.calls += 1
+        if self.local.calls % self.prune_every == 0:
+            self.prune(now)
+        return bool(allowed), tokens
+
+    def prune(self, now):
+        # A bucket past `expires` has refilled completely, which is the same
+        # state as having no row at all.
+        self.connection.execute('DELETE FROM bucket WHERE expires < ?', [now])
+
+    def reset(self):
+        self.connection.execute('DELETE FROM bucket')
+
+
+_stores = {}
+
+
+def get_store():
+    path = str(settings.THROTTLE_DATABASE)
+    if path not in _stores:
+        _stores[path] = TokenBucketStore(path)
+    return _stores[path]
+
+
+class TokenBucketRateThrottle(SimpleRateThrottle):
+    """`SimpleRateThrottle` backed by the shared token bucket store.
+
+    A rate of "100/day" is a bucket of 100 tokens refilled continuously over
+    a day, instead of a list of request timestamps in the cache.
+    """
+
+    def get_rate(self):
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            raise ImproperlyConfigured(f"No default throttle rate set for '{self.scope}' scope")
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        allowed, self.tokens = get_store().consume(self.key, self.num_requests, self.duration, self.timer())
+        return allowed
+
+    def wait(self):
+        return max(0, (1 - self.tokens) * self.duration / self.num_requests)
+
+
+class AnonTokenBucketThrottle(TokenBucketRateThrottle, AnonRateThrottle):
+    pass
+
+
+class UserTokenBucketThrottle(TokenBucketRateThrottle, UserRateThrottle):
+    pass
+
+
+class ScopedTokenBucketThrottle(TokenBucketRateThrottle):
+    """Per-endpoint buckets named by the view's `throttle_scope`.
+
+    `throttle_scope` may also map HTTP methods to scopes, so a view can give
+    its writes a tighter budget than its reads.
+    """
+
+    def __init__(self):
+        pass
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if isinstance(scope, dict):
+            scope = scope.get(request.method)
+        if not scope:
+            return True
+        self.scope = scope
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
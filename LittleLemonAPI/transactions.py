@@ -0,0 +1,11 @@
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def in_transaction(using=DEFAULT_DB_ALIAS):
+    """Whether the current code runs inside a transaction that may still roll back.
+
+    Whatever is read there must not go into the shared cache, which a
+    rollback does not undo. Like Django's durability check, this ignores
+    the transaction each TestCase wraps its tests in.
+    """
+    return any(not getattr(block, '_from_testcase', False) for block in connections[using].atomic_blocks)
@@ -1,15 +1,33 @@
+from django.conf import settings
 from django.urls import path
 from .views import *
 
 urlpatterns = [
     path('api/menu-items', MenuItemsView.as_view()),
+    path('api/menu-items/bulk', MenuItemsBulkView.as_view()),
     path('api/menu-items/<int:pk>', MenuItemView.as_view()),
     path('api/categories', CategoryView.as_view()),
+    path('api/menu/bootstrap', MenuBootstrapView.as_view()),
     path('api/groups/manager/users', ManagerUsersView.as_view()),
     path('api/groups/manager/users/<int:userId>', ManagerUserView.as_view()),
     path('api/groups/delivery-crew/users', DeliveryCrewUsersView.as_view()),
     path('api/groups/delivery-crew/users/<int:userId>', DeliveryCrewUserView.as_view()),
     path('api/cart/menu-items', CartView.as_view()),
+    path('api/cart/summary', CartSummaryView.as_view()),
     path('api/orders', OrdersView.as_view()),
+    path('api/orders/events', OrderEventsView.as_view()),
+    path('api/orders/export', OrdersExportView.as_view()),
     path('api/orders/<int:orderId>', OrderView.as_view()),
-]
\ No newline at end of file
+    path('api/reports/revenue', RevenueReportView.as_view()),
+    path('api/reports/top-menu-items', TopMenuItemsReportView.as_view()),
+    path('api/reports/delivery-crew', DeliveryCrewReportView.as_view()),
+    path('api/_metrics', MetricsView.as_view()),
+    path('api/batch', BatchView.as_view()),
+]
+
+# The sync views, which /api/batch dispatches to in-process.
+sync_urlpatterns = urlpatterns
+
+if settings.ASYNC_READ_VIEWS:
+    from .async_views import urlpatterns as async_urlpatterns
+    urlpatterns = async_urlpatterns + urlpatterns
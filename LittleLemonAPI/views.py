@@ -1,87 +1,126 @@
 from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.contrib.auth.models import User, Group
 from rest_framework.response import Response
+from rest_framework.exceptions import ParseError
 from rest_framework import status
 from rest_framework.views import APIView
+from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.decorators import permission_classes
-from django.utils import timezone
+from datetime import date
+from django.db import transaction
 from django.db.models import Q
 from rest_framework.pagination import PageNumberPagination
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import OrderingFilter, SearchFilter
-from .models import MenuItem, Cart, Order, OrderItem, Category
-from .serializers import MenuItemSerializer, UserSerializer, CartSerializer, OrderSerializer, CategorySerializer
+from django_filters.utils import translate_validation
+from rest_framework.filters import OrderingFilter
+from .models import MenuItem, Cart, Order, OrderEvent, ArchivedOrder, Category, DailyRevenue, MenuItemSales, DeliveryCrewStats
+from .serializers import MenuItemSerializer, UserSerializer, CartSerializer, CartItemInputSerializer, CartSummarySerializer, OrderSerializer, CategorySerializer
+from .serializers import ArchivedOrderSerializer, DailyRevenueSerializer, MenuItemSalesSerializer, DeliveryCrewStatsSerializer, BatchSerializer
+from .queries import optimize_queryset
+from .fastserializers import fast_data
+from .pagination import OrderCursorPagination
+from .filters import MenuItemFilter, MenuItemSearchFilter, OrderFilter
+from .catalog import catalog_response, bump_version, get_version
+from .fieldsets import sparse_serializer
+from .reports import record_order, record_order_change
+from .events import events_page, record_order_event, visible_events
+from .exports import EXPORT_FORMATS, abatched, batched, export_orders
+from .renderers import CSVRenderer, NDJSONRenderer
+from .parsers import CSVParser
+from .throttling import ScopedTokenBucketThrottle
+from .metrics import registry
+from .batch import dispatch
+from rest_framework.parsers import JSONParser
+from .services import add_to_cart, cart_summary, checkout, import_menu, EmptyCart, InvalidImport
+from .permissions import IsManager, IsManagerOrReadOnly, is_manager, is_delivery_crew, load_roles, DELIVERY_CREW, MANAGER
 
-class MenuItemsView(APIView):
+class MenuItemsView(generics.ListCreateAPIView):
+    permission_classes = [IsManagerOrReadOnly]
+    throttle_scope = 'menu'
+    serializer_class = MenuItemSerializer
     pagination_class = PageNumberPagination
-    filter_backends = [DjangoFilterBackend, OrderingFilter, SearchFilter]
-    ordering_fields = ['price']
+    filter_backends = [DjangoFilterBackend, OrderingFilter, MenuItemSearchFilter]
+    filterset_class = MenuItemFilter
+    ordering_fields = ['price', 'id']
+    ordering = ['id']
     search_fields = ['title', 'category__title']
-    filterset_fields = ['category']
+
+    def get_queryset(self):
+        return optimize_queryset(MenuItem.objects.all(), sparse_serializer(MenuItemSerializer, self.request))
 
     def get(self, request):
-        menu_items = MenuItem.objects.all()
-        category = request.query_params.get('category', None)
-        if category:
-            menu_items = menu_items.filter(category__title=category)
-        
-        ordering = request.query_params.get('ordering', None)
-        if ordering:
-            menu_items = menu_items.order_by(ordering)
-        
-        paginator = self.pagination_class()
-        paginated_items = paginator.paginate_queryset(menu_items, request)
-        serializer = MenuItemSerializer(paginated_items, many=True)
-        return paginator.get_paginated_response(serializer.data)
-    
+        return catalog_response(request, lambda: self.list(request))
+
+    def list(self, request):
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        return self.get_paginated_response(fast_data(sparse_serializer(MenuItemSerializer, request), page, many=True))
+
+    def perform_create(self, serializer):
+        serializer.save()
+        bump_version()
+
+class MenuItemsBulkView(APIView):
+    permission_classes = [IsManager]
+    parser_classes = [JSONParser, CSVParser]
+
     def post(self, request):
-        if not (request.user.is_superuser or request.user.groups.filter(name='Manager').exists()):
-            return Response({"detail": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
-        serializer = MenuItemSerializer(data=request.data)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            created, updated = import_menu(request.data)
+        except InvalidImport as exc:
+            return Response({"errors": exc.errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {"created": created, "updated": updated},
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
 
 class MenuItemView(APIView):
+    permission_classes = [IsManagerOrReadOnly]
+    throttle_scope = 'menu'
+
     def get(self, request, pk):
-        menu_item = get_object_or_404(MenuItem, pk=pk)
-        serializer = MenuItemSerializer(menu_item)
-        return Response(serializer.data)
+        return catalog_response(request, lambda: self.retrieve(request, pk))
+
+    def retrieve(self, request, pk):
+        serializer_class = sparse_serializer(MenuItemSerializer, request)
+        menu_item = get_object_or_404(optimize_queryset(MenuItem.objects.all(), serializer_class), pk=pk)
+        return Response(fast_data(serializer_class, menu_item))
     
     def put(self, request, pk):
-        if not (request.user.is_superuser or request.user.groups.filter(name='Manager').exists()):
-            return Response({"detail": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
         menu_item = get_object_or_404(MenuItem, pk=pk)
         serializer = MenuItemSerializer(menu_item, data=request.data)
         if serializer.is_valid():
             serializer.save()
+            bump_version()
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     def patch(self, request, pk):
-        if not (request.user.is_superuser or request.user.groups.filter(name='Manager').exists()):
-            return Response({"detail": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
         menu_item = get_object_or_404(MenuItem, pk=pk)
         serializer = MenuItemSerializer(menu_item, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
+            bump_version()
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     def delete(self, request, pk):
-        if not (request.user.is_superuser or request.user.groups.filter(name='Manager').exists()):
-            return Response({"detail": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
         menu_item = get_object_or_404(MenuItem, pk=pk)
         menu_item.delete()
+        bump_version()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 class CategoryView(APIView):
+    throttle_scope = 'menu'
+
     def get(self, request):
+        return catalog_response(request, lambda: self.list(request))
+
+    def list(self, request):
         categories = Category.objects.all()
-        serializer = CategorySerializer(categories, many=True)
-        return Response(serializer.data)
+        return Response(fast_data(CategorySerializer, categories, many=True))
     
     def post(self, request):
         if not request.user.is_superuser:
@@ -89,56 +128,76 @@ class CategoryView(APIView):
         serializer = CategorySerializer(data=request.data)
         if serializer.is_valid():
             serializer.save()
+            bump_version()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class MenuBootstrapView(APIView):
+    throttle_scope = 'menu'
+
+    def get(self, request):
+        return catalog_response(request, self.snapshot)
+
+    def snapshot(self):
+        return Response(self.snapshot_data(Category.objects.all(), self.featured_items(), self.menu_rows()))
+
+    def featured_items(self):
+        return optimize_queryset(MenuItem.objects.filter(featured__in=[True]).order_by('id'), MenuItemSerializer)
+
+    def menu_rows(self):
+        return MenuItem.objects.order_by('id').values_list('id', 'title', 'price', 'category_id')
+
+    def snapshot_data(self, categories, featured, rows):
+        """Everything the app's home screen needs: categories, featured items and an id -> [title, price, category_id] table of the menu."""
+        return {
+            "categories": fast_data(CategorySerializer, categories, many=True),
+            "featured": fast_data(MenuItemSerializer, featured, many=True),
+            "menu": {pk: [title, str(price), category_id] for pk, title, price, category_id in rows},
+        }
+
 class ManagerUsersView(APIView):
+    permission_classes = [IsManager]
+
     def get(self, request):
-        if not (request.user.is_superuser or request.user.groups.filter(name='Manager').exists()):
-            return Response({"detail": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
-        managers = User.objects.filter(groups__name='Manager')
+        managers = User.objects.filter(groups__name=MANAGER)
         serializer = UserSerializer(managers, many=True)
         return Response(serializer.data)
 
     def post(self, request):
-        if not (request.user.is_superuser or request.user.groups.filter(name='Manager').exists()):
-            return Response({"detail": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
         user = get_object_or_404(User, username=request.data.get('username'))
-        managers = Group.objects.get(name='Manager')
+        managers = Group.objects.get(name=MANAGER)
         managers.user_set.add(user)
         return Response({"detail": "User added to managers"}, status=status.HTTP_201_CREATED)
 
 class ManagerUserView(APIView):
+    permission_classes = [IsManager]
+
     def delete(self, request, userId):
-        if not (request.user.is_superuser or request.user.groups.filter(name='Manager').exists()):
-            return Response({"detail": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
         user = get_object_or_404(User, pk=userId)
-        managers = Group.objects.get(name='Manager')
+        managers = Group.objects.get(name=MANAGER)
         managers.user_set.remove(user)
         return Response({"detail": "User removed from managers"})
 
 class DeliveryCrewUsersView(APIView):
+    permission_classes = [IsManager]
+
     def get(self, request):
-        if not (request.user.is_superuser or request.user.groups.filter(name='Manager').exists()):
-            return Response({"detail": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
-        crew = User.objects.filter(groups__name='Delivery crew')
+        crew = User.objects.filter(groups__name=DELIVERY_CREW)
         serializer = UserSerializer(crew, many=True)
         return Response(serializer.data)
 
     def post(self, request):
-        if not (request.user.is_superuser or request.user.groups.filter(name='Manager').exists()):
-            return Response({"detail": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
         user = get_object_or_404(User, username=request.data.get('username'))
-        crew = Group.objects.get(name='Delivery crew')
+        crew = Group.objects.get(name=DELIVERY_CREW)
         crew.user_set.add(user)
         return Response({"detail": "User added to delivery crew"}, status=status.HTTP_201_CREATED)
 
 class DeliveryCrewUserView(APIView):
+    permission_classes = [IsManager]
+
     def delete(self, request, userId):
-        if not (request.user.is_superuser or request.user.groups.filter(name='Manager').exists()):
-            return Response({"detail": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
         user = get_object_or_404(User, pk=userId)
-        crew = Group.objects.get(name='Delivery crew')
+        crew = Group.objects.get(name=DELIVERY_CREW)
         crew.user_set.remove(user)
         return Response({"detail": "User removed from delivery crew"})
 
@@ -146,119 +205,261 @@ class CartView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        cart_items = Cart.objects.filter(user=request.user)
-        serializer = CartSerializer(cart_items, many=True)
-        return Response(serializer.data)
+        serializer_class = sparse_serializer(CartSerializer, request)
+        cart_items = optimize_queryset(Cart.objects.filter(user=request.user), serializer_class)
+        return Response(fast_data(serializer_class, cart_items, many=True))
 
     def post(self, request):
-        menuitem = get_object_or_404(MenuItem, pk=request.data.get('menuitem_id'))
-        quantity = int(request.data.get('quantity', 1))
-        unit_price = menuitem.price
-        price = quantity * unit_price
-        
-        cart_item, created = Cart.objects.get_or_create(
-            user=request.user,
-            menuitem=menuitem,
-            defaults={'quantity': quantity, 'unit_price': unit_price, 'price': price}
-        )
-        
-        if not created:
-            cart_item.quantity = quantity
-            cart_item.price = price
-            cart_item.save()
-        
-        serializer = CartSerializer(cart_item)
-        return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+        many = isinstance(request.data, list)
+        serializer = CartItemInputSerializer(data=request.data if many else [request.data], many=True, allow_empty=False)
+        if not serializer.is_valid():
+            return Response(serializer.errors if many else serializer.errors[0], status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            cart_items, created = add_to_cart(request.user, serializer.validated_data)
+        except MenuItem.DoesNotExist:
+            raise Http404('No MenuItem matches the given query.')
+
+        data = fast_data(CartSerializer, cart_items if many else cart_items[0], many=many)
+        return Response(data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
 
     def delete(self, request):
         Cart.objects.filter(user=request.user).delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-class OrdersView(APIView):
+class CartSummaryView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        if request.user.is_superuser or request.user.groups.filter(name='Manager').exists():
-            orders = Order.objects.all()
-        elif request.user.groups.filter(name='Delivery crew').exists():
-            orders = Order.objects.filter(delivery_crew=request.user)
+        return Response(CartSummarySerializer(cart_summary(request.user)).data)
+
+class OrdersView(APIView):
+    permission_classes = [IsAuthenticated]
+    pagination_class = OrderCursorPagination
+    throttle_scope = {'POST': 'checkout'}
+
+    def get_queryset(self, request):
+        """The orders `request.user` may list, filtered by `?status=` and shaped by `?fields=`/`?expand=`."""
+        orders = optimize_queryset(Order.objects.all(), sparse_serializer(OrderSerializer, request))
+        if is_manager(request):
+            orders = orders.all()
+        elif is_delivery_crew(request):
+            orders = orders.filter(delivery_crew=request.user)
         else:
-            orders = Order.objects.filter(user=request.user)
-        serializer = OrderSerializer(orders, many=True)
-        return Response(serializer.data)
+            orders = orders.filter(user=request.user)
+        filterset = OrderFilter(request.query_params, queryset=orders)
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        return filterset.qs
+
+    def get(self, request):
+        orders = self.get_queryset(request)
+        paginator = self.pagination_class()
+        paginated_orders = paginator.paginate_queryset(orders, request)
+        serializer_class = sparse_serializer(OrderSerializer, request)
+        return paginator.get_paginated_response(fast_data(serializer_class, paginated_orders, many=True))
 
     def post(self, request):
-        cart_items = Cart.objects.filter(user=request.user)
-        if not cart_items.exists():
+        idempotency_key = request.headers.get('Idempotency-Key')
+        if idempotency_key is not None and not 0 < len(idempotency_key) <= 255:
+            return Response({"detail": "Invalid Idempotency-Key"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            data, replayed = checkout(request.user, idempotency_key)
+        except EmptyCart:
             return Response({"detail": "Cart is empty"}, status=status.HTTP_400_BAD_REQUEST)
+        headers = {'Idempotent-Replayed': 'true'} if replayed else None
+        return Response(data, status=status.HTTP_201_CREATED, headers=headers)
 
-        total = sum(item.price for item in cart_items)
-        order = Order.objects.create(
-            user=request.user,
-            total=total,
-            date=timezone.now().date()
-        )
+class OrdersExportView(APIView):
+    permission_classes = [IsManager]
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
 
-        order_items = []
-        for cart_item in cart_items:
-            order_items.append(OrderItem(
-                order=order,
-                menuitem=cart_item.menuitem,
-                quantity=cart_item.quantity,
-                unit_price=cart_item.unit_price,
-                price=cart_item.price
-            ))
-        OrderItem.objects.bulk_create(order_items)
-        cart_items.delete()
-
-        serializer = OrderSerializer(order)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    def get(self, request):
+        try:
+            start = date.fromisoformat(request.query_params['start']) if 'start' in request.query_params else None
+            end = date.fromisoformat(request.query_params['end']) if 'end' in request.query_params else None
+        except ValueError:
+            return Response({"detail": "Dates must be YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+
+        export_format = request.accepted_renderer.format
+        lines = EXPORT_FORMATS[export_format](export_orders(start, end))
+        chunks = abatched(lines) if settings.ASYNC_READ_VIEWS else batched(lines)
+        response = StreamingHttpResponse(chunks, content_type=f'{request.accepted_renderer.media_type}; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="orders.{export_format}"'
+        return response
+
+class OrderEventsView(APIView):
+    permission_classes = [IsAuthenticated]
+    # One long poll replaces many short ones, so the feed has its own budget
+    # instead of drawing on the daily user rate.
+    throttle_classes = [ScopedTokenBucketThrottle]
+    throttle_scope = 'order-events'
+    # Seconds `?wait=` may hold the request open. A sync view would pin its
+    # worker thread for the whole wait, as an open stream would, so only
+    # AsyncOrderEventsView long-polls; here the feed answers at once.
+    max_wait = 0
+
+    def get(self, request):
+        since, _ = self.cursor(request)
+        data, last_id = events_page(visible_events(request), since)
+        return Response({"events": data, "last_id": last_id})
+
+    def cursor(self, request):
+        """The event id to read after and how long to wait for new events, from the query string."""
+        try:
+            since = max(int(request.query_params.get('since', request.headers.get('Last-Event-ID', 0))), 0)
+            wait = min(max(float(request.query_params.get('wait', 0)), 0), self.max_wait)
+        except ValueError:
+            raise ParseError('since and wait must be numbers')
+        return since, wait
 
 class OrderView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, orderId):
-        if request.user.is_superuser or request.user.groups.filter(name='Manager').exists():
-            order = get_object_or_404(Order, pk=orderId)
-        elif request.user.groups.filter(name='Delivery crew').exists():
-            order = get_object_or_404(Order, pk=orderId, delivery_crew=request.user)
-        else:
-            order = get_object_or_404(Order, pk=orderId, user=request.user)
-        serializer = OrderSerializer(order)
-        return Response(serializer.data)
+        serializer_class = sparse_serializer(OrderSerializer, request)
+        order = self.visible(request, optimize_queryset(Order.objects.all(), serializer_class)).filter(pk=orderId).first()
+        if order is None:
+            # Delivered orders past ORDER_ARCHIVE_AFTER_DAYS are read from the archive.
+            serializer_class = sparse_serializer(ArchivedOrderSerializer, request)
+            archived = optimize_queryset(ArchivedOrder.objects.all(), serializer_class)
+            order = self.visible(request, archived).filter(pk=orderId).first()
+            if order is None:
+                raise Http404('No Order matches the given query.')
+        return Response(fast_data(serializer_class, order))
+
+    def visible(self, request, orders):
+        """The `orders` `request.user` may see: all for managers, their deliveries for crew, their own otherwise."""
+        if is_manager(request):
+            return orders
+        if is_delivery_crew(request):
+            return orders.filter(delivery_crew=request.user)
+        return orders.filter(user=request.user)
 
     def put(self, request, orderId):
-        if not (request.user.is_superuser or request.user.groups.filter(name='Manager').exists()):
+        if not is_manager(request):
             return Response({"detail": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
         
-        order = get_object_or_404(Order, pk=orderId)
-        serializer = OrderSerializer(order, data=request.data)
-        if serializer.is_valid():
+        # The order is read inside the transaction, which holds the write
+        # lock, so `before` is the state this update replaces even when
+        # another update of the same order ran in the meantime.
+        with transaction.atomic():
+            order = get_object_or_404(optimize_queryset(Order.objects.all(), OrderSerializer), pk=orderId)
+            before = (order.delivery_crew_id, order.status)
+            serializer = OrderSerializer(order, data=request.data)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             if 'delivery_crew_id' in request.data:
                 delivery_crew = get_object_or_404(User, pk=request.data['delivery_crew_id'])
-                if not delivery_crew.groups.filter(name='Delivery crew').exists():
+                if DELIVERY_CREW not in load_roles(delivery_crew):
                     return Response({"detail": "User is not delivery crew"}, status=status.HTTP_400_BAD_REQUEST)
                 serializer.validated_data['delivery_crew'] = delivery_crew
             serializer.save()
-            return Response(serializer.data)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            record_order_change(before, order)
+            if before != (order.delivery_crew_id, order.status):
+                record_order_event(OrderEvent.UPDATED, order, before[0])
+        return Response(serializer.data)
 
     def patch(self, request, orderId):
-        if request.user.groups.filter(name='Delivery crew').exists():
-            order = get_object_or_404(Order, pk=orderId, delivery_crew=request.user)
-            if 'status' in request.data:
-                order.status = request.data['status']
-                order.save()
-                serializer = OrderSerializer(order)
-                return Response(serializer.data)
-            return Response({"detail": "Only status can be updated"}, status=status.HTTP_400_BAD_REQUEST)
-        elif request.user.is_superuser or request.user.groups.filter(name='Manager').exists():
+        if is_delivery_crew(request):
+            with transaction.atomic():
+                order = get_object_or_404(optimize_queryset(Order.objects.all(), OrderSerializer), pk=orderId, delivery_crew=request.user)
+                if 'status' not in request.data:
+                    return Response({"detail": "Only status can be updated"}, status=status.HTTP_400_BAD_REQUEST)
+                before = (order.delivery_crew_id, order.status)
+                serializer = OrderSerializer(order, data={'status': request.data['status']}, partial=True)
+                if not serializer.is_valid():
+                    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+                serializer.save()
+                record_order_change(before, order)
+                if before != (order.delivery_crew_id, order.status):
+                    record_order_event(OrderEvent.UPDATED, order, before[0])
+            return Response(serializer.data)
+        elif is_manager(request):
             return self.put(request, orderId)
         return Response({"detail": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
 
     def delete(self, request, orderId):
-        if not (request.user.is_superuser or request.user.groups.filter(name='Manager').exists()):
+        if not is_manager(request):
             return Response({"detail": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
-        order = get_object_or_404(Order, pk=orderId)
-        order.delete()
+        order = get_object_or_404(Order.objects.prefetch_related('order_items'), pk=orderId)
+        with transaction.atomic():
+            record_order(order, order.order_items.all(), sign=-1)
+            record_order_event(OrderEvent.DELETED, order)
+            order.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+class RevenueReportView(APIView):
+    permission_classes = [IsManager]
+
+    def get(self, request):
+        rows = DailyRevenue.objects.order_by('-date')
+        try:
+            if 'start' in request.query_params:
+                rows = rows.filter(date__gte=date.fromisoformat(request.query_params['start']))
+            if 'end' in request.query_params:
+                rows = rows.filter(date__lte=date.fromisoformat(request.query_params['end']))
+        except ValueError:
+            return Response({"detail": "Dates must be YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = DailyRevenueSerializer(rows.filter(orders__gt=0), many=True)
+        return Response(serializer.data)
+
+class TopMenuItemsReportView(APIView):
+    permission_classes = [IsManager]
+
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), 100)
+        except ValueError:
+            return Response({"detail": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        rows = MenuItemSales.objects.select_related('menuitem').filter(quantity__gt=0).order_by('-quantity', 'menuitem_id')
+        serializer = MenuItemSalesSerializer(rows[:max(limit, 0)], many=True)
+        return Response(serializer.data)
+
+class DeliveryCrewReportView(APIView):
+    permission_classes = [IsManager]
+
+    def get(self, request):
+        rows = DeliveryCrewStats.objects.select_related('delivery_crew').filter(assigned__gt=0).order_by('-delivered', 'delivery_crew_id')
+        serializer = DeliveryCrewStatsSerializer(rows, many=True)
+        return Response(serializer.data)
+
+class MetricsView(APIView):
+    permission_classes = [IsManager]
+
+    def get(self, request):
+        return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+class BatchView(APIView):
+    permission_classes = [IsAuthenticated]
+    # Each sub-request is throttled by its own view, so a batch costs the
+    # same tokens as its requests sent one by one.
+    throttle_classes = []
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        batch = serializer.validated_data
+        if not batch['atomic']:
+            responses = [dispatch(request, item['method'], item['path'], item.get('body')) for item in batch['requests']]
+            return Response({"responses": responses})
+
+        # All or nothing: the first sub-request that fails rolls back the
+        # ones before it and the rest are not run.
+        responses = []
+        version = get_version()
+        try:
+            with transaction.atomic():
+                for item in batch['requests']:
+                    responses.append(dispatch(request, item['method'], item['path'], item.get('body')))
+                    if responses[-1]['status'] >= 400:
+                        transaction.set_rollback(True)
+                        return Response({"detail": "Batch rolled back", "responses": responses}, status=status.HTTP_400_BAD_REQUEST)
+        finally:
+            # Catalog writes bump the version before the batch commits or
+            # rolls back, so other workers may have cached what they read
+            # in between; a bump once it has ended retires those entries.
+            if get_version() != version:
+                bump_version()
+        return Response({"responses": responses})